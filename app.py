@@ -1,12 +1,13 @@
 import streamlit as st
 import pandas as pd
-import os
-from datetime import datetime, timedelta
-from io import BytesIO
-from services import db
-from utils import convert_timedelta_to_hours
+import tempfile
+from services import db, export, flight, metrics, prewarm, reports
 
 
+metrics.start_http_server()
+prewarm.start()
+render = metrics.Render("timesheet")
+
 st.title("Timesheet Monitoring Sementara")
 
 # Sidebar page selection
@@ -15,111 +16,173 @@ st.sidebar.title("Navigation")
 st.sidebar.header("Filters")
 employee_code = st.sidebar.text_input("Employee Code", "")
 
-today = datetime.today()
-start_of_week = today - timedelta(days=today.weekday())
-start_of_prev_week = start_of_week - timedelta(weeks=1)
-end_of_prev_week = start_of_prev_week + timedelta(days=6)
-
-start_date = st.sidebar.date_input("Start Date", start_of_prev_week.date())
-end_date = st.sidebar.date_input("End Date", end_of_prev_week.date())
-
-# Load timesheet data filtered by date range
-df = db.load_timesheet_data(start_date, end_date)
-
-mapping_file = "master project mapping.xlsx"
-if os.path.exists(mapping_file):
-    mapping_df = pd.read_excel(mapping_file, usecols="B:C")
-    mapping_df.columns = ["project_name", "project_code"]
-    mapping_df = mapping_df.dropna(subset=["project_name", "project_code"])
-
-    df = df.merge(mapping_df, on="project_code", how="left")
-    df["project_name"] = df["project_name"].fillna(df["project"])
-    df.drop(columns=["project"], inplace=True)
-    df.rename(columns={"project_name": "project"}, inplace=True)
-    df = df[
-        [
-            "code",
-            "date",
-            "project",
-            "module",
-            "status",
-            "billable",
-            "man_hours",
-            "name",
-            "project_code",
-        ]
-    ]
-else:
-    st.warning(f"Mapping file '{mapping_file}' not found. Please upload the file.")
+# The default view is the one services.prewarm keeps warm
+start_of_prev_week, end_of_prev_week = prewarm.previous_week()
+
+start_date = st.sidebar.date_input("Start Date", start_of_prev_week)
+end_date = st.sidebar.date_input("End Date", end_of_prev_week)
 
 status_options = ["Approved", "Modified", "Pending", "Draft"]
-default_status_options = ["Approved", "Modified"]
+default_status_options = prewarm.DEFAULT_STATUSES
 status_filter = st.sidebar.multiselect(
     "Timesheet Status", status_options, default=default_status_options
 )
-if status_filter:
-    df = df[df["status"].isin(status_filter)]
 
-billable_options = df["billable"].unique().tolist()
-default_billable_options = ["Billable", "Non-Billable"]
+billable_options = ["Billable", "Non-Billable"]
 billable_filter = st.sidebar.multiselect("Billable", billable_options, default=[])
-if billable_filter:
-    df = df[df["billable"].isin(billable_filter)]
 
-project_options = df["project"].dropna().unique().tolist()
-project_filter = st.sidebar.multiselect("Project", project_options, default=[])
-if project_filter:
-    df = df[df["project"].isin(project_filter)]
+# Project options come from a light distinct query so that the selection
+# itself can be pushed down into SQL; names are already mapped there
+with render.span("projects_query") as span:
+    projects_df = span.record(db.load_timesheet_projects(start_date, end_date))
+project_names = dict(zip(projects_df["project_code"], projects_df["project"]))
+project_filter = st.sidebar.multiselect(
+    "Project",
+    projects_df["project_code"].tolist(),
+    default=[],
+    format_func=lambda code: project_names.get(code, code),
+)
 
 if start_date > end_date:
     st.sidebar.error("Start date must be before end date.")
 
-# Convert date column to datetime for consistent handling
-df["date"] = pd.to_datetime(df["date"]).dt.tz_localize(None)
-
-# Filter by employee code only (date filtering is now done in the database)
-filtered_df = df[df["code"].str.contains(employee_code, case=False, na=False)]
-
-downloaded_csv_df = filtered_df.copy()
-downloaded_csv_df["man_hours"] = downloaded_csv_df["man_hours"].apply(
-    convert_timedelta_to_hours
+timesheet_filters = {
+    "statuses": status_filter,
+    "billable": billable_filter,
+    "project_codes": project_filter,
+    "employee_code": employee_code,
+}
+
+# Hours per person and date are aggregated in the database; the raw rows are
+# only loaded when the detail table is requested
+prewarm.record_page_load(
+    "timesheet",
+    db.timesheet_summary_cached(start_date, end_date, **timesheet_filters),
 )
 
-csv = downloaded_csv_df.to_csv(index=False).encode("utf-8")
-st.download_button(
-    label="Download CSV",
-    data=csv,
-    file_name="filtered_data.csv",
-    mime="text/csv",
-)
+# Sessions queued behind other heavy queries see a notice instead of a
+# silently spinning page
+with render.span("summary_query") as span, flight.waiting_notice():
+    pivot_df = span.record(
+        db.load_timesheet_summary(start_date, end_date, **timesheet_filters)
+    )
+pivot_df["date"] = pd.to_datetime(pivot_df["date"]).dt.tz_localize(None)
+
+# Set while rows are read from the local replica rather than Postgres
+replica_synced_at = db.replica_synced_at()
+if replica_synced_at is not None:
+    st.caption(f"Data as of {replica_synced_at.strftime('%Y-%m-%d %H:%M %Z')}")
 
 st.subheader("Filtered Data")
-st.write(filtered_df)
-st.write(f"Number of records: {filtered_df.shape[0]}")
-
-filtered_df["man_hours"] = filtered_df["man_hours"].apply(convert_timedelta_to_hours)
-
-if not filtered_df.empty:
-    pivot_df = filtered_df.groupby(["name", "date"])["man_hours"].sum().reset_index()
-    pivot_table = pivot_df.pivot(index="name", columns="date", values="man_hours")
-    pivot_table = pivot_table.fillna(0)
-    pivot_table.columns = [col.strftime("%Y-%m-%d") for col in pivot_table.columns]
-    pivot_table["Total"] = pivot_table.sum(axis=1)
-    pivot_table.loc["Total"] = pivot_table.sum(axis=0)
-
-    def highlight_zeros(val):
-        return "background-color: red" if val == 0 else ""
-
-    styled_pivot = pivot_table.style.map(
-        highlight_zeros,
-        subset=pd.IndexSlice[
-            pivot_table.index[:-1],
-            pivot_table.columns[:-1],
-        ],
-    ).format("{:.2f}")
+if st.button("Prepare CSV export"):
+    # Streamed from a server-side cursor into a temp file, so the export
+    # never holds the whole result set in a DataFrame. download_button takes
+    # a BufferedReader (not a spooled file) and reads it before returning.
+    with tempfile.NamedTemporaryFile(suffix=".csv") as csv_file:
+        with render.span("csv_export") as span, flight.waiting_notice():
+            row_count = export.write_timesheet_csv(
+                csv_file, start_date, end_date, **timesheet_filters
+            )
+            csv_file.flush()
+            span.record(rows=row_count, nbytes=csv_file.tell())
+        with open(csv_file.name, "rb") as csv_data:
+            st.download_button(
+                label=f"Download CSV ({row_count} rows)",
+                data=csv_data,
+                file_name="filtered_data.csv",
+                mime="text/csv",
+            )
+
+if st.checkbox("Show detail rows"):
+    # Only one page of rows is fetched, using keyset pagination in SQL; the
+    # cursor after each visited page is kept in the session so moving to the
+    # next page never rescans the rows before it
+    sort_col, order_col, detail_size_col, detail_page_col = st.columns(4)
+    with sort_col:
+        sort_column = st.selectbox(
+            "Sort by", db.TIMESHEET_SORT_COLUMNS, key="detail_sort"
+        )
+    with order_col:
+        descending = st.toggle("Descending", key="detail_descending")
+    with detail_size_col:
+        detail_page_size = st.selectbox(
+            "Rows per page", [50, 100, 200, 500], key="detail_page_size"
+        )
+
+    with render.span("detail_count") as span:
+        row_count = db.count_timesheet_rows(start_date, end_date, **timesheet_filters)
+        span.record(rows=row_count)
+    detail_page_count = max((row_count + detail_page_size - 1) // detail_page_size, 1)
+    with detail_page_col:
+        detail_page = st.number_input(
+            "Page",
+            min_value=1,
+            max_value=detail_page_count,
+            value=1,
+            key="detail_page",
+        )
+
+    view = (
+        db.timesheet_filters(**timesheet_filters),
+        start_date,
+        end_date,
+        sort_column,
+        descending,
+        detail_page_size,
+    )
+    if st.session_state.get("detail_view") != view:
+        st.session_state["detail_view"] = view
+        st.session_state["detail_cursors"] = {}
+    cursors = st.session_state["detail_cursors"]
+
+    # Jumping to a page whose predecessor was never visited falls back to
+    # OFFSET for that one page
+    with render.span("detail_query") as span:
+        df, cursor = db.load_timesheet_page(
+            start_date,
+            end_date,
+            sort_column=sort_column,
+            descending=descending,
+            page_size=detail_page_size,
+            after=cursors.get(detail_page - 1),
+            offset=(detail_page - 1) * detail_page_size,
+            **timesheet_filters,
+        )
+        span.record(df)
+    if cursor is not None:
+        cursors[detail_page] = cursor
+
+    df["date"] = pd.to_datetime(df["date"]).dt.tz_localize(None)
+
+    with render.span("detail_render"):
+        st.dataframe(df, use_container_width=True, hide_index=True)
+    st.write(
+        f"Number of records: {row_count} (page {detail_page} of {detail_page_count})"
+    )
+
+if not pivot_df.empty:
+    with render.span("pivot") as span:
+        pivot_table = span.record(reports.person_date_pivot(pivot_df))
 
     st.subheader("Summary Table (Person vs Date)")
-    st.dataframe(styled_pivot, use_container_width=True)
+
+    # Only the visible page of people is styled and sent to the browser;
+    # every page ends with the Total row of the full table
+    people = len(pivot_table.index) - 1
+    page_col, size_col = st.columns(2)
+    with size_col:
+        page_size = st.selectbox("Rows per page", [25, 50, 100, 200], index=1)
+    with page_col:
+        page_count = max((people + page_size - 1) // page_size, 1)
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1)
+
+    with render.span("styling") as span:
+        page_table = span.record(reports.pivot_page(pivot_table, page, page_size))
+        styled_pivot = reports.style_person_date_pivot(page_table)
+
+    with render.span("summary_render"):
+        st.dataframe(styled_pivot, use_container_width=True)
+    st.caption(f"Page {page} of {page_count} ({people} people)")
 
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -130,3 +193,6 @@ if not filtered_df.empty:
         st.metric("Total Days", len(pivot_table.columns) - 1)
 else:
     st.warning("No data available for the selected filters.")
+
+metrics.debug_expander(render)
+render.finish()
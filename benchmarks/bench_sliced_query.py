@@ -0,0 +1,96 @@
+"""
+Single-query vs month-sliced parallel loading of timesheet rows.
+
+Loads the same date range through load_timesheet_data's single-query path
+and through load_timesheet_data_sliced at several parallelism levels, with
+the cache cleared before every run, asserts that all results have the same
+rows in the same order and reports the median wall time of each.
+
+Usage:
+    python -m benchmarks.bench_sliced_query 2024-01-01 2024-12-31 [--runs 3]
+        [--workers 2 4 8] [--slice-months 1]
+
+The database is the one configured through config.py (.env) unless
+``--database-url`` is given, e.g. one kept by ``benchmarks.run --keep``.
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import config
+
+from services import db
+from services.flight import QueryLimiter
+
+
+def timed(load, runs):
+    seconds = []
+    for _ in range(runs):
+        db.timesheet_cache.clear()
+        started = time.perf_counter()
+        df = load()
+        seconds.append(time.perf_counter() - started)
+    return df, seconds
+
+
+def same_rows(df, expected):
+    """
+    Same TIMESHEET_ORDER sequence and same rows. Rows tied on every sort
+    column come back from Postgres in no particular order, so they are
+    compared as a multiset.
+    """
+    if not df[db.TIMESHEET_ORDER].equals(expected[db.TIMESHEET_ORDER]):
+        return False
+    columns = db.TIMESHEET_COLUMNS
+    return df.sort_values(columns, ignore_index=True).equals(
+        expected.sort_values(columns, ignore_index=True)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("start_date")
+    parser.add_argument("end_date")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--slice-months", type=int, default=1)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    if args.database_url:
+        config.SQLALCHEMY_DATABASE_URL = args.database_url
+    config.QUERY_PARALLELISM = 1
+    # Slices should not queue behind each other in the benchmark
+    db.query_limiter = QueryLimiter(max(args.workers))
+
+    expected, seconds = timed(
+        lambda: db.load_timesheet_data(args.start_date, args.end_date), args.runs
+    )
+    report = {
+        "start_date": args.start_date,
+        "end_date": args.end_date,
+        "rows": len(expected),
+        "slices": len(
+            db.date_slices(args.start_date, args.end_date, args.slice_months)
+        ),
+        "single_query_s": statistics.median(seconds),
+    }
+    for workers in args.workers:
+        df, seconds = timed(
+            lambda: db.load_timesheet_data_sliced(
+                args.start_date,
+                args.end_date,
+                slice_months=args.slice_months,
+                max_workers=workers,
+            ),
+            args.runs,
+        )
+        assert same_rows(df, expected), f"sliced result differs with {workers} workers"
+        report[f"sliced_{workers}_workers_s"] = statistics.median(seconds)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
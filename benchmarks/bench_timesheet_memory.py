@@ -0,0 +1,145 @@
+"""
+Memory report for the timesheet loaders on a synthetic year of data.
+
+Feeds the same synthetic driver rows (Python str/datetime/timedelta tuples,
+as psycopg2 returns them) to the two loading paths and reports the final
+frame size and the peak RSS of each, measured in a fresh subprocess:
+
+- ``object``: fetch everything, then build one DataFrame, like pd.read_sql
+  does for load_timesheet_data;
+- ``compact``: build one chunk at a time and convert it to compact Arrow
+  types, like load_timesheet_data_compact.
+
+Usage:
+    python -m benchmarks.bench_timesheet_memory [--employees 400] [--days 365]
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from services import db
+
+
+def synthetic_rows(employees, days, seed=0):
+    """Yield timesheet rows for every working day of ``days`` days."""
+    rng = np.random.default_rng(seed)
+    projects = [(f"PRJ{p:04d}", f"Project {p} Implementation") for p in range(80)]
+    modules = [f"Module {m}" for m in range(40)]
+    statuses = ["Approved", "Modified", "Pending", "Draft"]
+    start = datetime(2024, 1, 1)
+    for e in range(employees):
+        code, name = f"EMP{e:05d}", f"First{e} Last{e}"
+        for d in range(days):
+            day = start + timedelta(days=d)
+            if day.weekday() >= 5:
+                continue
+            for _ in range(int(rng.integers(1, 3))):
+                project_code, project = projects[int(rng.integers(len(projects)))]
+                module = modules[int(rng.integers(len(modules)))]
+                status = statuses[int(rng.integers(len(statuses)))]
+                for billable in ("Billable", "Non-Billable"):
+                    hours = timedelta(minutes=30 * int(rng.integers(1, 9)))
+                    yield (
+                        code,
+                        day,
+                        project,
+                        module,
+                        status,
+                        billable,
+                        hours,
+                        name,
+                        project_code,
+                    )
+
+
+def load_object(rows, chunk_size):
+    return pd.DataFrame.from_records(list(rows), columns=db.TIMESHEET_COLUMNS)
+
+
+def load_compact(rows, chunk_size):
+    def chunks():
+        while True:
+            batch = list(islice(rows, chunk_size))
+            if not batch:
+                return
+            yield pd.DataFrame.from_records(batch, columns=db.TIMESHEET_COLUMNS)
+
+    return db.compact_timesheet_frame(
+        db.compact_timesheet_chunk(chunk) for chunk in chunks()
+    )
+
+
+def measure(mode, employees, days, chunk_size):
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    loader = load_object if mode == "object" else load_compact
+    df = loader(synthetic_rows(employees, days), chunk_size)
+    return {
+        "mode": mode,
+        "rows": len(df),
+        "seconds": time.perf_counter() - started,
+        "frame_bytes": int(df.memory_usage(index=True, deep=True).sum()),
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "peak_rss_growth_bytes": (
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+        )
+        * 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--employees", type=int, default=400)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--mode", choices=["object", "compact"])
+    args = parser.parse_args()
+
+    if args.mode:
+        result = measure(args.mode, args.employees, args.days, args.chunk_size)
+        print(json.dumps(result))
+        return
+
+    report = {}
+    for mode in ("object", "compact"):
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.bench_timesheet_memory",
+                "--mode",
+                mode,
+                "--employees",
+                str(args.employees),
+                "--days",
+                str(args.days),
+                "--chunk-size",
+                str(args.chunk_size),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        report[mode] = json.loads(output)
+    report["frame_ratio"] = (
+        report["object"]["frame_bytes"] / report["compact"]["frame_bytes"]
+    )
+    report["peak_rss_ratio"] = (
+        report["object"]["peak_rss_growth_bytes"]
+        / report["compact"]["peak_rss_growth_bytes"]
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
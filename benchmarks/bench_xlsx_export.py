@@ -0,0 +1,173 @@
+"""
+Benchmark of the Remaining Mandays XLSX export.
+
+Builds a synthetic wide table (projects x employees, Bill/NonBill per
+employee) and times the original cell-by-cell openpyxl writer against
+services.export.create_xlsx_with_custom_headers.
+
+Usage:
+    python -m benchmarks.bench_xlsx_export [--projects 500] [--employees 300]
+"""
+
+import argparse
+import io
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.styles import Alignment, Font
+from openpyxl.utils import get_column_letter
+
+from services.export import create_xlsx_with_custom_headers
+from services.reports import remaining_mandays_flat
+
+
+def synthetic_wide_table(projects, employees, seed=0):
+    """A remaining_mandays_wide()-shaped table."""
+    rng = np.random.default_rng(seed)
+    values = np.empty((projects, 2 * employees))
+    values[:, 0::2] = rng.integers(-40, 80, (projects, employees)) / 2
+    values[:, 1::2] = rng.integers(-10, 20, (projects, employees)) / 2
+    return pd.DataFrame(
+        values,
+        index=pd.MultiIndex.from_arrays(
+            [
+                [f"PRJ{i:05d}" for i in range(projects)],
+                [f"Project {i}" for i in range(projects)],
+            ],
+            names=["project_code", "project_name"],
+        ),
+        columns=pd.MultiIndex.from_product(
+            [[f"EMP{e:05d}" for e in range(employees)], ["Bill", "NonBill"]],
+            names=["employee_code", "type"],
+        ),
+    )
+
+
+def legacy_create_xlsx(df):
+    """
+    The original cell-by-cell writer from pages/Remaining_Mandays.py, kept
+    as the baseline.
+    """
+    # Create a new workbook and worksheet
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Remaining Mandays"
+
+    # Get employee codes from the dataframe columns
+    employee_codes = sorted(
+        set(
+            [
+                col.split("_")[0]
+                for col in df.columns
+                if col.endswith(("_Billable", "_NonBillable"))
+            ]
+        )
+    )
+
+    # Create the first header row (employee codes)
+    header_row1 = ["Project Code", "Project Name"]
+    for emp_code in employee_codes:
+        header_row1.extend([emp_code, ""])  # Employee code spans 2 columns
+
+    # Create the second header row (Bill/Non Bill)
+    header_row2 = ["", ""]  # Empty for project columns
+    for emp_code in employee_codes:
+        header_row2.extend(["Bill", "Non Bill"])
+
+    # Write headers to worksheet
+    ws.append(header_row1)
+    ws.append(header_row2)
+
+    # Merge cells for employee codes in first row
+    col_index = 3  # Start after project columns
+    for emp_code in employee_codes:
+        ws.merge_cells(
+            start_row=1, start_column=col_index, end_row=1, end_column=col_index + 1
+        )
+        col_index += 2
+
+    # Style the headers
+    for row in [1, 2]:
+        for col in range(1, len(header_row1) + 1):
+            cell = ws.cell(row=row, column=col)
+            cell.font = Font(bold=True)
+            cell.alignment = Alignment(horizontal="center", vertical="center")
+
+    # Add data rows
+    for _, row in df.iterrows():
+        data_row = [row.get("project_code", ""), row.get("project_name", "")]
+
+        for emp_code in employee_codes:
+            billable_col = f"{emp_code}_Billable"
+            non_billable_col = f"{emp_code}_NonBillable"
+
+            billable_value = row.get(billable_col, 0)
+            non_billable_value = row.get(non_billable_col, 0)
+
+            data_row.extend([billable_value, non_billable_value])
+
+        ws.append(data_row)
+
+    # Auto-adjust column widths
+
+    for col_num in range(1, len(header_row1) + 1):
+        max_length = 0
+        column_letter = get_column_letter(col_num)
+
+        # Check all cells in this column
+        for row_num in range(1, ws.max_row + 1):
+            cell = ws.cell(row=row_num, column=col_num)
+            try:
+                if hasattr(cell, "value") and cell.value is not None:
+                    if len(str(cell.value)) > max_length:
+                        max_length = len(str(cell.value))
+            except Exception:
+                pass
+
+        adjusted_width = min(max(max_length + 2, 10), 50)  # Minimum 10, maximum 50
+        ws.column_dimensions[column_letter].width = adjusted_width
+
+    # Save to bytes buffer
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+
+    return buffer.getvalue()
+
+
+def timed(func, df, runs):
+    durations = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        data = func(df)
+        durations.append(time.perf_counter() - started)
+    return {"seconds_min": min(durations), "bytes": len(data)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--projects", type=int, default=500)
+    parser.add_argument("--employees", type=int, default=300)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    wide = synthetic_wide_table(args.projects, args.employees)
+    # The original writer took the flat table with _Billable/_NonBillable
+    legacy = timed(legacy_create_xlsx, remaining_mandays_flat(wide), args.runs)
+    write_only = timed(create_xlsx_with_custom_headers, wide, args.runs)
+    report = {
+        "projects": args.projects,
+        "employees": args.employees,
+        "cells": wide.size,
+        "legacy": legacy,
+        "write_only": write_only,
+        "speedup": legacy["seconds_min"] / write_only["seconds_min"],
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
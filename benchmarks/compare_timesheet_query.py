@@ -0,0 +1,153 @@
+"""
+Regression check and EXPLAIN ANALYZE timing for the timesheet query.
+
+Runs the original double-scan UNION ALL query and the single-scan
+LATERAL VALUES query from services.db over the same date range, asserts that
+both return identical frames and reports planning/execution time of each.
+
+Usage:
+    python -m benchmarks.compare_timesheet_query 2024-01-01 2024-03-31 [--runs 5]
+
+The database is the one configured through config.py (.env) unless
+``--database-url`` is given, e.g. one kept by ``benchmarks.run --keep``.
+"""
+
+import argparse
+import json
+import statistics
+
+import config
+import pandas as pd
+
+from services import db
+
+LEGACY_QUERY = """
+    SELECT employee_code as code, 
+           timesheet.date as date, 
+           COALESCE(project_mapping.project_name, ops_project.project_name) as project, 
+           CASE WHEN ops_static_module.module_name IS NOT NULL 
+                THEN ops_static_module.module_name 
+                WHEN ops_general_module.module_name IS NOT NULL
+                THEN ops_general_module.module_name
+                ELSE module.module_name END as module, 
+           tsp.parameter_name as status, 
+           'Billable' as billable, 
+           timesheet."manHoursBillable" as man_hours, 
+           first_name || ' ' || last_name as name, 
+           CASE WHEN project.project_code IS NOT NULL 
+                THEN project.project_code 
+                ELSE NULL END as project_code 
+    FROM employee 
+    JOIN job ON employee.job_id = job.id 
+    JOIN timesheet ON employee.id = timesheet.employee_id 
+    JOIN ops_project ON timesheet.ops_project_id = ops_project.id 
+    JOIN timesheet_status ON timesheet.timesheet_status_id = timesheet_status.id 
+    JOIN parameter tsp ON timesheet_status.status_id = tsp.id 
+    LEFT JOIN project ON ops_project.project_id = project.id 
+    LEFT JOIN project_mapping ON project.project_code = project_mapping.project_code 
+    LEFT JOIN ops_static_module ON timesheet.ops_static_module_id = ops_static_module.id 
+    LEFT JOIN ops_project_module ON timesheet.ops_project_module_id = ops_project_module.id 
+    LEFT JOIN "module" ON ops_project_module.module_id = "module".id 
+    LEFT JOIN ops_general_module ON ops_project_module.ops_general_module_id = ops_general_module.id
+    WHERE timesheet."manHoursBillable" > '00:00' 
+    AND timesheet.date BETWEEN %(start_date)s AND %(end_date)s
+    UNION ALL 
+    SELECT employee_code as code, 
+           timesheet.date as date, 
+           COALESCE(project_mapping.project_name, ops_project.project_name) as project, 
+           CASE WHEN ops_static_module.module_name IS NOT NULL 
+                THEN ops_static_module.module_name 
+                WHEN ops_general_module.module_name IS NOT NULL
+                THEN ops_general_module.module_name
+                ELSE module.module_name END as module, 
+           tsp.parameter_name as status, 
+           'Non-Billable' as billable, 
+           "manHoursNonBillable" as man_hours, 
+           first_name || ' ' || last_name as name, 
+           CASE WHEN project.project_code IS NOT NULL 
+                THEN project.project_code 
+                ELSE NULL END as project_code 
+    FROM employee 
+    JOIN job ON employee.job_id = job.id 
+    JOIN timesheet ON employee.id = timesheet.employee_id 
+    JOIN ops_project ON timesheet.ops_project_id = ops_project.id 
+    JOIN timesheet_status ON timesheet.timesheet_status_id = timesheet_status.id 
+    JOIN parameter tsp ON timesheet_status.status_id = tsp.id 
+    LEFT JOIN project ON ops_project.project_id = project.id 
+    LEFT JOIN project_mapping ON project.project_code = project_mapping.project_code 
+    LEFT JOIN ops_static_module ON timesheet.ops_static_module_id = ops_static_module.id 
+    LEFT JOIN ops_project_module ON timesheet.ops_project_module_id = ops_project_module.id 
+    LEFT JOIN "module" ON ops_project_module.module_id = "module".id 
+    LEFT JOIN ops_general_module ON ops_project_module.ops_general_module_id = ops_general_module.id
+    WHERE timesheet."manHoursNonBillable" > '00:00' 
+    AND timesheet.date BETWEEN %(start_date)s AND %(end_date)s
+    ORDER BY code, date, project, module, status, billable
+"""
+
+SINGLE_SCAN_QUERY = db._TIMESHEET_QUERY.format(filters="")
+
+
+def assert_equivalent(engine, params):
+    """Both queries must return the same rows in the same ORDER BY order."""
+    legacy = pd.read_sql(LEGACY_QUERY, engine, params=params)
+    single = pd.read_sql(SINGLE_SCAN_QUERY, engine, params=params)
+    assert list(legacy.columns) == list(single.columns), "column mismatch"
+    assert len(legacy) == len(single), f"{len(legacy)} != {len(single)} rows"
+    # Rows that tie on every ORDER BY column may come back in either order
+    all_columns = list(legacy.columns)
+    pd.testing.assert_frame_equal(
+        legacy.sort_values(all_columns, ignore_index=True),
+        single.sort_values(all_columns, ignore_index=True),
+    )
+    pd.testing.assert_frame_equal(
+        legacy[db.TIMESHEET_ORDER], single[db.TIMESHEET_ORDER]
+    )
+    return len(single)
+
+
+def explain_analyze(engine, query, params, runs):
+    planning, execution = [], []
+    with engine.connect() as conn:
+        for _ in range(runs):
+            plan = conn.exec_driver_sql(
+                "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query, params
+            ).scalar()[0]
+            planning.append(plan["Planning Time"])
+            execution.append(plan["Execution Time"])
+    return {
+        "planning_ms_median": statistics.median(planning),
+        "execution_ms_median": statistics.median(execution),
+        "execution_ms_min": min(execution),
+        "shared_hit_blocks": plan["Plan"].get("Shared Hit Blocks"),
+        "shared_read_blocks": plan["Plan"].get("Shared Read Blocks"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("start_date")
+    parser.add_argument("end_date")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    if args.database_url:
+        config.SQLALCHEMY_DATABASE_URL = args.database_url
+    engine = db.get_engine()
+    params = {"start_date": args.start_date, "end_date": args.end_date}
+    rows = assert_equivalent(engine, params)
+    before = explain_analyze(engine, LEGACY_QUERY, params, args.runs)
+    after = explain_analyze(engine, SINGLE_SCAN_QUERY, params, args.runs)
+    report = {
+        "start_date": args.start_date,
+        "end_date": args.end_date,
+        "rows": rows,
+        "union_all": before,
+        "lateral_values": after,
+        "speedup": before["execution_ms_median"] / after["execution_ms_median"],
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
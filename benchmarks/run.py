@@ -0,0 +1,240 @@
+"""
+Stage-by-stage benchmark of the report pipeline on synthetic data.
+
+Creates a throwaway database next to ``--admin-url``, fills it through
+benchmarks.synthetic, times each stage of the pages (queries, pandas steps,
+styling and exports) and writes the results as JSON so runs can be compared
+between releases. The database is dropped afterwards unless ``--keep``.
+
+Usage:
+    python -m benchmarks.run --admin-url postgresql+psycopg2://user:pw@localhost/postgres \\
+        --employees 500 --years 1 --output bench_results.json
+
+Pass ``--database-url`` instead to reuse an already populated database.
+"""
+
+import argparse
+import io
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import config
+import pandas as pd
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+from benchmarks import synthetic
+from services import db, export, mapping, reports
+
+
+def _size(value):
+    if isinstance(value, pd.DataFrame):
+        return len(value), int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (bytes, str)):
+        return None, len(value)
+    if isinstance(value, int):
+        return value, None
+    return None, None
+
+
+def time_stage(results, name, func, repeat):
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        value = func()
+        durations.append(time.perf_counter() - started)
+    rows, nbytes = _size(value)
+    results[name] = {
+        "seconds_min": min(durations),
+        "seconds_median": statistics.median(durations),
+        "rows": rows,
+        "bytes": nbytes,
+    }
+    print(f"{name:28s} {min(durations):8.3f}s", flush=True)
+    return value
+
+
+def run_stages(start_date, end_date, repeat):
+    """Time every stage against the database services.db is pointed at."""
+    results = {}
+    approved = db.timesheet_filters(statuses=["Approved", "Modified"])
+
+    raw = time_stage(
+        results,
+        "query_timesheet",
+        lambda: db._query_timesheet_data(start_date, end_date),
+        repeat,
+    )
+    time_stage(
+        results,
+        "query_timesheet_filtered",
+        lambda: db._query_timesheet_data(start_date, end_date, approved),
+        repeat,
+    )
+    summary = time_stage(
+        results,
+        "query_summary",
+        lambda: db._query_timesheet_summary(start_date, end_date, approved),
+        repeat,
+    )
+    mandays = time_stage(
+        results,
+        "query_planned_vs_realized",
+        lambda: db._query_planned_vs_realized_mandays(db.load_rollup_refreshed_at()),
+        repeat,
+    )
+
+    # The pandas steps that used to follow the raw query in app.py
+    mapping_df = mapping.load_mapping()
+    time_stage(
+        results,
+        "mapping_merge",
+        lambda: raw.merge(
+            mapping_df.rename(columns={"project_name": "mapped_name"}),
+            on="project_code",
+            how="left",
+        ),
+        repeat,
+    )
+    time_stage(
+        results,
+        "filters",
+        lambda: raw[
+            raw["status"].isin(["Approved", "Modified"])
+            & raw["code"].str.contains("EMP000", case=False, na=False)
+        ],
+        repeat,
+    )
+
+    summary["date"] = pd.to_datetime(summary["date"])
+    pivot_table = time_stage(
+        results, "pivot", lambda: reports.person_date_pivot(summary), repeat
+    )
+    time_stage(
+        results,
+        "styling",
+        lambda: reports.style_person_date_pivot(
+            reports.pivot_page(pivot_table, 1, 50)
+        ).to_html(),
+        repeat,
+    )
+
+    def csv_export():
+        buffer = io.BytesIO()
+        export.write_timesheet_csv(
+            buffer, start_date, end_date, statuses=["Approved", "Modified"]
+        )
+        return buffer.getvalue()
+
+    time_stage(results, "csv_export", csv_export, repeat)
+    wide = time_stage(
+        results,
+        "remaining_wide",
+        lambda: reports.remaining_mandays_wide(mandays),
+        repeat,
+    )
+    time_stage(
+        results,
+        "xlsx_export",
+        lambda: export.create_xlsx_with_custom_headers(wide),
+        repeat,
+    )
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _use_database(url):
+    config.SQLALCHEMY_DATABASE_URL = url
+    db.dispose_engine()
+    db.clear_caches()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--admin-url", help="server to create the throwaway db on")
+    target.add_argument("--database-url", help="already populated database")
+    parser.add_argument("--employees", type=int, default=500)
+    parser.add_argument("--projects", type=int, default=None)
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--range-days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", action="store_true", help="keep the database")
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+
+    end_date = date.today()
+    start_date = end_date - timedelta(days=args.range_days - 1)
+    report = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "employees": args.employees,
+            "projects": args.projects,
+            "years": args.years,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "repeat": args.repeat,
+        }
+    }
+
+    admin_engine = None
+    database = None
+    if args.admin_url:
+        database = f"report_bench_{int(time.time())}"
+        admin_engine = create_engine(args.admin_url, isolation_level="AUTOCOMMIT")
+        with admin_engine.connect() as conn:
+            conn.execute(text(f'CREATE DATABASE "{database}"'))
+        report["meta"]["database"] = database
+        url = make_url(args.admin_url).set(database=database)
+        _use_database(url.render_as_string(hide_password=False))
+    else:
+        _use_database(args.database_url)
+
+    try:
+        if args.admin_url:
+            started = time.perf_counter()
+            report["volumes"] = synthetic.populate(
+                db.get_engine(),
+                employees=args.employees,
+                projects=args.projects,
+                years=args.years,
+                seed=args.seed,
+                end=end_date,
+            )
+            synthetic.populate_mapping(seed=args.seed)
+            report["meta"]["populate_seconds"] = time.perf_counter() - started
+        with db.get_engine().connect() as conn:
+            report["meta"]["postgres"] = conn.execute(
+                text("SHOW server_version")
+            ).scalar()
+        report["stages"] = run_stages(start_date, end_date, args.repeat)
+    finally:
+        db.dispose_engine()
+        if admin_engine is not None and not args.keep:
+            with admin_engine.connect() as conn:
+                conn.execute(text(f'DROP DATABASE IF EXISTS "{database}"'))
+            admin_engine.dispose()
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Minimal reporting schema: the tables and columns that services.db queries.
+"""
+
+SCHEMA = """
+CREATE TABLE parameter (
+    id integer PRIMARY KEY,
+    parameter_name text NOT NULL
+);
+CREATE TABLE timesheet_status (
+    id integer PRIMARY KEY,
+    status_id integer NOT NULL REFERENCES parameter (id)
+);
+CREATE TABLE job (
+    id integer PRIMARY KEY,
+    job_name text NOT NULL
+);
+CREATE TABLE employee (
+    id integer PRIMARY KEY,
+    employee_code text NOT NULL,
+    first_name text NOT NULL,
+    last_name text NOT NULL,
+    job_id integer NOT NULL REFERENCES job (id)
+);
+CREATE TABLE client (
+    id integer PRIMARY KEY,
+    client_name text NOT NULL
+);
+CREATE TABLE project (
+    id integer PRIMARY KEY,
+    project_code text NOT NULL,
+    client_id integer REFERENCES client (id)
+);
+CREATE TABLE ops_project (
+    id integer PRIMARY KEY,
+    project_id integer REFERENCES project (id),
+    project_name text NOT NULL
+);
+CREATE TABLE ops_static_module (
+    id integer PRIMARY KEY,
+    module_name text NOT NULL
+);
+CREATE TABLE "module" (
+    id integer PRIMARY KEY,
+    module_name text NOT NULL
+);
+CREATE TABLE ops_general_module (
+    id integer PRIMARY KEY,
+    module_name text NOT NULL
+);
+CREATE TABLE ops_project_module (
+    id integer PRIMARY KEY,
+    ops_project_id integer NOT NULL REFERENCES ops_project (id),
+    module_id integer REFERENCES "module" (id),
+    ops_general_module_id integer REFERENCES ops_general_module (id)
+);
+CREATE TABLE mandays (
+    id integer PRIMARY KEY,
+    ops_project_id integer NOT NULL REFERENCES ops_project (id),
+    employee_id integer NOT NULL REFERENCES employee (id),
+    "mandaysBillable" numeric NOT NULL,
+    "mandaysNonBillable" numeric NOT NULL,
+    "updatedAt" timestamptz NOT NULL DEFAULT now()
+);
+CREATE TABLE timesheet (
+    id bigint PRIMARY KEY,
+    employee_id integer NOT NULL REFERENCES employee (id),
+    date date NOT NULL,
+    ops_project_id integer NOT NULL REFERENCES ops_project (id),
+    timesheet_status_id integer NOT NULL REFERENCES timesheet_status (id),
+    ops_static_module_id integer REFERENCES ops_static_module (id),
+    ops_project_module_id integer REFERENCES ops_project_module (id),
+    "manHoursBillable" interval NOT NULL,
+    "manHoursNonBillable" interval NOT NULL,
+    "updatedAt" timestamptz NOT NULL DEFAULT now()
+);
+-- Report-owned; created by python -m services.mapping init in deployments
+CREATE TABLE project_mapping (
+    project_code text PRIMARY KEY,
+    project_name text NOT NULL,
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+"""
+
+INDEXES = """
+CREATE INDEX timesheet_date_idx ON timesheet (date);
+CREATE INDEX timesheet_ops_project_idx ON timesheet (ops_project_id);
+CREATE INDEX timesheet_employee_idx ON timesheet (employee_id);
+CREATE INDEX timesheet_updated_idx ON timesheet ("updatedAt");
+CREATE INDEX mandays_ops_project_idx ON mandays (ops_project_id);
+CREATE INDEX mandays_updated_idx ON mandays ("updatedAt");
+"""
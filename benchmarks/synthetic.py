@@ -0,0 +1,232 @@
+"""
+Synthetic data generator for the reporting schema.
+
+Volumes are driven by the number of employees, projects and years; each
+employee books one or two entries per working day on the projects they are
+planned on. Rows are loaded with COPY in batches.
+"""
+
+import io
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.schema import INDEXES, SCHEMA
+
+STATUSES = ["Approved", "Modified", "Pending", "Draft"]
+
+
+def _copy(cursor, table, df):
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    columns = ", ".join(f'"{column}"' for column in df.columns)
+    cursor.copy_expert(
+        f'COPY "{table}" ({columns}) FROM STDIN WITH (FORMAT csv)', buffer
+    )
+
+
+def _minutes(values):
+    return np.char.add(values.astype(str), " minutes")
+
+
+def _working_days(years, end):
+    start = end - timedelta(days=365 * years)
+    days = pd.bdate_range(start, end)
+    return days.date
+
+
+def populate(engine, employees=500, projects=None, years=1, seed=0, end=None):
+    """
+    Create the schema on an empty database and fill it. Returns row counts.
+    """
+    rng = np.random.default_rng(seed)
+    projects = projects or max(employees // 5, 10)
+    end = end or date.today()
+    days = _working_days(years, end)
+    counts = {}
+
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute(SCHEMA)
+
+        def load(table, df):
+            _copy(cursor, table, df)
+            counts[table] = counts.get(table, 0) + len(df)
+
+        load(
+            "parameter",
+            pd.DataFrame({"id": range(1, 5), "parameter_name": STATUSES}),
+        )
+        load(
+            "timesheet_status",
+            pd.DataFrame({"id": range(1, 5), "status_id": range(1, 5)}),
+        )
+        load(
+            "job",
+            pd.DataFrame(
+                {"id": range(1, 21), "job_name": [f"Job {i}" for i in range(1, 21)]}
+            ),
+        )
+        employee_ids = np.arange(1, employees + 1)
+        load(
+            "employee",
+            pd.DataFrame(
+                {
+                    "id": employee_ids,
+                    "employee_code": [f"EMP{i:05d}" for i in employee_ids],
+                    "first_name": [f"First{i}" for i in employee_ids],
+                    "last_name": [f"Last{i}" for i in employee_ids],
+                    "job_id": rng.integers(1, 21, employees),
+                }
+            ),
+        )
+        clients = max(projects // 10, 1)
+        load(
+            "client",
+            pd.DataFrame(
+                {
+                    "id": range(1, clients + 1),
+                    "client_name": [f"Client {i}" for i in range(1, clients + 1)],
+                }
+            ),
+        )
+        project_ids = np.arange(1, projects + 1)
+        load(
+            "project",
+            pd.DataFrame(
+                {
+                    "id": project_ids,
+                    "project_code": [f"PRJ{i:05d}" for i in project_ids],
+                    "client_id": rng.integers(1, clients + 1, projects),
+                }
+            ),
+        )
+        load(
+            "ops_project",
+            pd.DataFrame(
+                {
+                    "id": project_ids,
+                    "project_id": project_ids,
+                    "project_name": [f"Ops Project {i}" for i in project_ids],
+                }
+            ),
+        )
+        for table, size in (
+            ("ops_static_module", 10),
+            ("module", 50),
+            ("ops_general_module", 20),
+        ):
+            load(
+                table,
+                pd.DataFrame(
+                    {
+                        "id": range(1, size + 1),
+                        "module_name": [f"{table} {i}" for i in range(1, size + 1)],
+                    }
+                ),
+            )
+        # Five modules per project, a third of them general modules
+        project_module_project = np.repeat(project_ids, 5)
+        general = rng.random(len(project_module_project)) < 0.33
+        load(
+            "ops_project_module",
+            pd.DataFrame(
+                {
+                    "id": np.arange(1, len(project_module_project) + 1),
+                    "ops_project_id": project_module_project,
+                    "module_id": rng.integers(1, 51, len(project_module_project)),
+                    "ops_general_module_id": pd.Series(
+                        rng.integers(1, 21, len(project_module_project)),
+                        dtype="Int64",
+                    ).where(general),
+                }
+            ),
+        )
+
+        # Every employee is planned on one to three projects
+        assignments = rng.integers(1, 4, employees)
+        mandays_employee = np.repeat(employee_ids, assignments)
+        mandays_project = rng.integers(1, projects + 1, len(mandays_employee))
+        load(
+            "mandays",
+            pd.DataFrame(
+                {
+                    "id": np.arange(1, len(mandays_employee) + 1),
+                    "ops_project_id": mandays_project,
+                    "employee_id": mandays_employee,
+                    "mandaysBillable": rng.integers(0, 120, len(mandays_employee)),
+                    "mandaysNonBillable": rng.integers(0, 30, len(mandays_employee)),
+                }
+            ),
+        )
+
+        # Timesheets, generated in batches of employees to bound memory
+        # Row e - 1 holds employee e's planned projects, cycled to width 3
+        plans = np.empty((employees, 3), dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(assignments)])
+        for e in range(employees):
+            planned = mandays_project[offsets[e] : offsets[e + 1]]
+            plans[e] = planned[np.arange(3) % len(planned)]
+        next_id = 1
+        batch = 100
+        for first in range(0, employees, batch):
+            ids = employee_ids[first : first + batch]
+            per_day = rng.integers(1, 3, (len(ids), len(days)))
+            entry_employee = np.repeat(np.repeat(ids, len(days)), per_day.ravel())
+            entry_day = np.repeat(np.tile(days, len(ids)), per_day.ravel())
+            n = len(entry_employee)
+            entry_project = plans[entry_employee - 1, rng.integers(0, 3, n)]
+            static = rng.random(n) < 0.3
+            load(
+                "timesheet",
+                pd.DataFrame(
+                    {
+                        "id": np.arange(next_id, next_id + n),
+                        "employee_id": entry_employee,
+                        "date": entry_day,
+                        "ops_project_id": entry_project,
+                        "timesheet_status_id": rng.choice(
+                            [1, 2, 3, 4], n, p=[0.6, 0.2, 0.15, 0.05]
+                        ),
+                        "ops_static_module_id": pd.Series(
+                            rng.integers(1, 11, n), dtype="Int64"
+                        ).where(static),
+                        "ops_project_module_id": pd.Series(
+                            (entry_project - 1) * 5 + rng.integers(1, 6, n),
+                            dtype="Int64",
+                        ).where(~static),
+                        "manHoursBillable": _minutes(30 * rng.integers(0, 17, n)),
+                        "manHoursNonBillable": _minutes(30 * rng.integers(0, 5, n)),
+                    }
+                ),
+            )
+            next_id += n
+
+        cursor.execute(INDEXES)
+        cursor.execute("ANALYZE")
+        raw.commit()
+    finally:
+        raw.close()
+    return counts
+
+
+def populate_mapping(share=0.8, seed=0):
+    """Map a share of the generated project codes to display names."""
+    from sqlalchemy import text
+
+    from services import db, mapping
+
+    rng = np.random.default_rng(seed)
+    codes = pd.read_sql(text("SELECT project_code FROM project"), db.get_engine())
+    codes = codes[rng.random(len(codes)) < share]
+    return mapping.save_mapping(
+        pd.DataFrame(
+            {
+                "project_name": "Mapped " + codes["project_code"],
+                "project_code": codes["project_code"],
+            }
+        )
+    )
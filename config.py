@@ -10,3 +10,48 @@ POSTGRES_PORT = os.environ.get("POSTGRES_PORT")
 POSTGRES_DATABASE = os.environ.get("POSTGRES_DATABASE")
 
 SQLALCHEMY_DATABASE_URL = f"postgresql+psycopg2://{POSTGRES_USERNAME}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DATABASE}"
+
+# Connection pool settings, shared by every session and page of the process
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", 120000))
+
+# Result cache shared by all app replicas on a common volume; unset disables
+SHARED_CACHE_DIR = os.environ.get("SHARED_CACHE_DIR")
+SHARED_CACHE_MAX_BYTES = int(
+    os.environ.get("SHARED_CACHE_MAX_BYTES", 1024 * 1024 * 1024)
+)
+
+# Heavy report queries allowed to run at once per process; more wait in line
+QUERY_CONCURRENCY = int(os.environ.get("QUERY_CONCURRENCY", 4))
+
+# Long timesheet ranges are split into slices of QUERY_SLICE_MONTHS months
+# run on up to QUERY_PARALLELISM threads; 1 keeps the single-query path
+QUERY_PARALLELISM = int(os.environ.get("QUERY_PARALLELISM", 1))
+QUERY_SLICE_MONTHS = int(os.environ.get("QUERY_SLICE_MONTHS", 1))
+
+# Day-partitioned timesheet result cache
+CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", 256 * 1024 * 1024))
+CACHE_RECENT_TTL = int(os.environ.get("CACHE_RECENT_TTL", 300))
+
+# Seconds between background prewarms of the default views; 0 disables them
+PREWARM_INTERVAL = int(os.environ.get("PREWARM_INTERVAL", 300))
+
+# Local Parquet replica of the timesheet rows; unset keeps reading Postgres
+REPLICA_DIR = os.environ.get("REPLICA_DIR")
+# Postgres is read instead once the last replica sync is older than this,
+# twice the sync interval of the replica service in docker-compose
+REPLICA_MAX_LAG = int(os.environ.get("REPLICA_MAX_LAG", 600))
+
+# Incremental refreshes of the planned-vs-realized rollup and the replica
+ROLLUP_UPDATED_COLUMN = os.environ.get("ROLLUP_UPDATED_COLUMN", "updatedAt")
+ROLLUP_WATERMARK_OVERLAP = int(os.environ.get("ROLLUP_WATERMARK_OVERLAP", 300))
+# Statement timeout of those background jobs, whose full rebuilds scan the
+# whole history; 0 means no limit (DB_STATEMENT_TIMEOUT_MS applies otherwise)
+REFRESH_STATEMENT_TIMEOUT_MS = int(os.environ.get("REFRESH_STATEMENT_TIMEOUT_MS", 0))
+
+# Stage timing metrics; the endpoint and file are disabled when unset
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 0))
+METRICS_FILE = os.environ.get("METRICS_FILE")
@@ -1,143 +1,76 @@
 import streamlit as st
 import pandas as pd
-import os
 from io import BytesIO
 
-st.header("🗂️ Project Mapping Editor")
+from services import mapping
 
-mapping_file = "master project mapping.xlsx"
+st.header("🗂️ Project Mapping Editor")
 
 # Create tabs for different functions
 mapping_tab1, mapping_tab2, mapping_tab3 = st.tabs(
     ["View Current Mapping", "Edit Mapping", "Upload New Mapping"]
 )
 
+current_mapping = mapping.load_mapping()
+
 with mapping_tab1:
     st.subheader("Current Project Mapping")
-    if os.path.exists(mapping_file):
-        current_mapping = pd.read_excel(mapping_file, usecols="B:C")
-        current_mapping.columns = ["project_name", "project_code"]
-        current_mapping = current_mapping.dropna(
-            subset=["project_name", "project_code"]
-        )
-
+    if not current_mapping.empty:
         # Display current mapping
         st.dataframe(current_mapping, use_container_width=True)
         st.write(f"Total mappings: {len(current_mapping)}")
 
-        # Download current mapping as Excel (same format as template)
-
-        excel_mapping = pd.DataFrame()
-        excel_mapping["A"] = [""] * len(current_mapping)  # Empty column A
-        excel_mapping["B"] = current_mapping["project_name"]
-        excel_mapping["C"] = current_mapping["project_code"]
-
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine="openpyxl") as writer:
-            excel_mapping.to_excel(writer, index=False, header=False)
-
-        st.download_button(
-            label="Download Current Mapping as Excel",
-            data=output.getvalue(),
-            file_name="current_project_mapping.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
+        # Export current mapping as Excel (same format as template)
+        if st.button("📤 Export Mapping to Excel"):
+            st.download_button(
+                label="Download Current Mapping as Excel",
+                data=mapping.mapping_to_excel(current_mapping),
+                file_name="current_project_mapping.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            )
     else:
-        st.warning("No mapping file found.")
+        st.warning("No project mappings stored yet.")
 
 with mapping_tab2:
     st.subheader("Edit Project Mapping")
 
-    if os.path.exists(mapping_file):
-        # Load current mapping for editing
-        edit_mapping = pd.read_excel(mapping_file, usecols="B:C")
-        edit_mapping.columns = ["project_name", "project_code"]
-        edit_mapping = edit_mapping.dropna(subset=["project_name", "project_code"])
-
-        # Create a form for editing
-        with st.form("edit_mapping_form"):
-            st.write("Edit existing mappings or add new ones:")
-
-            # Use data editor for interactive editing
-            edited_mapping = st.data_editor(
-                edit_mapping,
-                num_rows="dynamic",
-                use_container_width=True,
-                column_config={
-                    "project_name": st.column_config.TextColumn(
-                        "Project Name",
-                        help="Name of the project",
-                        max_chars=100,
-                        required=True,
-                    ),
-                    "project_code": st.column_config.TextColumn(
-                        "Project Code",
-                        help="Unique code for the project",
-                        max_chars=50,
-                        required=True,
-                    ),
-                },
-            )
-
-            # Save button
-            if st.form_submit_button("💾 Save Changes", type="primary"):
-                try:
-                    # Clean the data
-                    cleaned_mapping = edited_mapping.dropna(
-                        subset=["project_name", "project_code"]
-                    )
-
-                    # Create Excel file with proper structure
-                    # The original file has headers starting from column B
-                    output_df = pd.DataFrame()
-                    output_df["A"] = [""] * len(cleaned_mapping)  # Empty column A
-                    output_df["B"] = cleaned_mapping["project_name"]
-                    output_df["C"] = cleaned_mapping["project_code"]
-
-                    # Save to Excel
-                    output_df.to_excel(mapping_file, index=False, header=False)
-
-                    st.success(
-                        f"✅ Successfully saved {len(cleaned_mapping)} project mappings to '{mapping_file}'!"
-                    )
-                    st.rerun()
-
-                except Exception as e:
-                    st.error(f"❌ Error saving file: {str(e)}")
-    else:
-        st.warning(
-            "No existing mapping file found. Please upload a file first or create a new one."
+    # Create a form for editing
+    with st.form("edit_mapping_form"):
+        st.write("Edit existing mappings or add new ones:")
+
+        # Use data editor for interactive editing
+        edited_mapping = st.data_editor(
+            current_mapping,
+            num_rows="dynamic",
+            use_container_width=True,
+            column_config={
+                "project_name": st.column_config.TextColumn(
+                    "Project Name",
+                    help="Name of the project",
+                    max_chars=100,
+                    required=True,
+                ),
+                "project_code": st.column_config.TextColumn(
+                    "Project Code",
+                    help="Unique code for the project",
+                    max_chars=50,
+                    required=True,
+                ),
+            },
         )
 
-        # Option to create new mapping file
-        st.write("**Create New Mapping File:**")
-        with st.form("new_mapping_form"):
-            new_project_name = st.text_input("Project Name")
-            new_project_code = st.text_input("Project Code")
-
-            if st.form_submit_button("Create New Mapping File"):
-                if new_project_name and new_project_code:
-                    try:
-                        # Create new mapping DataFrame
-                        new_mapping = pd.DataFrame(
-                            {
-                                "A": [""],
-                                "B": [new_project_name],
-                                "C": [new_project_code],
-                            }
-                        )
-
-                        # Save to Excel
-                        new_mapping.to_excel(mapping_file, index=False, header=False)
-                        st.success(
-                            f"✅ Created new mapping file '{mapping_file}' with initial entry!"
-                        )
-                        st.rerun()
+        # Save button
+        if st.form_submit_button("💾 Save Changes", type="primary"):
+            try:
+                # Upsert all rows and delete removed ones in one transaction
+                saved = mapping.save_mapping(edited_mapping)
+                st.success(f"✅ Successfully saved {saved} project mappings!")
+                st.rerun()
 
-                    except Exception as e:
-                        st.error(f"❌ Error creating file: {str(e)}")
-                else:
-                    st.error("Please enter both project name and project code.")
+            except ValueError as e:
+                st.error(f"❌ {str(e)}")
+            except Exception as e:
+                st.error(f"❌ Error saving mapping: {str(e)}")
 
 # Add some helpful information
 st.info(
@@ -145,7 +78,7 @@ st.info(
 **💡 Tips for Project Mapping:**
 - Column B should contain project names
 - Column C should contain project codes  
-- Avoid duplicate project codes
+- Project codes must be unique
 - Use the data editor to add, edit, or delete rows
 - Changes are saved immediately when you click 'Save Changes'
 """
@@ -163,9 +96,7 @@ with mapping_tab3:
     if uploaded_file is not None:
         try:
             # Preview the uploaded file
-            preview_df = pd.read_excel(uploaded_file, usecols="B:C")
-            preview_df.columns = ["project_name", "project_code"]
-            preview_df = preview_df.dropna(subset=["project_name", "project_code"])
+            preview_df = mapping.read_mapping_excel(uploaded_file)
 
             st.write("**Preview of uploaded file:**")
             st.dataframe(preview_df, use_container_width=True)
@@ -176,13 +107,12 @@ with mapping_tab3:
             with col1:
                 if st.button("✅ Replace Current Mapping", type="primary"):
                     try:
-                        # Save the uploaded file
-                        with open(mapping_file, "wb") as f:
-                            f.write(uploaded_file.getvalue())
-                        st.success("✅ Successfully uploaded new mapping file!")
+                        # Import the uploaded mapping into the database
+                        mapping.save_mapping(preview_df)
+                        st.success("✅ Successfully imported new mapping!")
                         st.rerun()
                     except Exception as e:
-                        st.error(f"❌ Error uploading file: {str(e)}")
+                        st.error(f"❌ Error importing mapping: {str(e)}")
 
             with col2:
                 if st.button("📥 Download Template"):
@@ -196,8 +126,6 @@ with mapping_tab3:
                     )
 
                     # Convert to Excel bytes
-                    from io import BytesIO
-
                     output = BytesIO()
                     with pd.ExcelWriter(output, engine="openpyxl") as writer:
                         template_df.to_excel(writer, index=False, header=False)
@@ -0,0 +1,165 @@
+"""
+Headless batch generation of the timesheet and Remaining Mandays reports.
+
+Loads the timesheet rows for the range and the planned-vs-realized report
+once, splits them per project, employee or ISO week, and writes each
+unit's reports from a process pool:
+
+    OUTPUT/<by>/<unit>/timesheet.csv           rows, man_hours in hours
+    OUTPUT/<by>/<unit>/summary.csv             Person x Date pivot
+    OUTPUT/<by>/<unit>/remaining_mandays.xlsx  (not for --by week)
+
+Per week, Remaining Mandays is not date scoped and is written once as
+OUTPUT/week/remaining_mandays.xlsx.
+
+Usage:
+    python -m services.batch OUTPUT [--by project|employee|week]
+        [--start YYYY-MM-DD] [--end YYYY-MM-DD] [--units CODE ...]
+        [--statuses Approved Modified] [--workers N]
+
+The range defaults to the previous Monday-Sunday week, like the app.
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from services import db, export, prewarm, reports
+from utils import convert_timedeltas_to_hours
+
+_UNIT_COLUMNS = {
+    "project": ("project_code", "project"),
+    "employee": ("code", "employee_code"),
+}
+
+
+def write_unit_reports(directory, rows, mandays=None):
+    """Write one unit's reports into ``directory``; returns the file names."""
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    rows.to_csv(os.path.join(directory, "timesheet.csv"), index=False)
+    written.append("timesheet.csv")
+    if not rows.empty:
+        pivot_table = reports.person_date_pivot(reports.timesheet_summary(rows))
+        pivot_table.to_csv(os.path.join(directory, "summary.csv"))
+        written.append("summary.csv")
+    if mandays is not None and not mandays.empty:
+        write_remaining_mandays(directory, mandays)
+        written.append("remaining_mandays.xlsx")
+    return written
+
+
+def write_remaining_mandays(directory, mandays):
+    wide = reports.remaining_mandays_wide(mandays)
+    with open(os.path.join(directory, "remaining_mandays.xlsx"), "wb") as f:
+        f.write(export.create_xlsx_with_custom_headers(wide))
+
+
+def _unit_name(value):
+    return str(value).replace(os.sep, "_")
+
+
+def split_units(rows, mandays, by, units=None):
+    """Yield ``(unit, rows, mandays)`` per project, employee or ISO week."""
+    if by == "week":
+        weeks = pd.to_datetime(rows["date"]).dt.strftime("%G-W%V")
+        for week, week_rows in rows.groupby(weeks, sort=True):
+            if not units or week in units:
+                yield week, week_rows, None
+        return
+
+    row_column, mandays_column = _UNIT_COLUMNS[by]
+    row_groups = dict(tuple(rows.groupby(row_column, sort=False)))
+    mandays_groups = dict(tuple(mandays.groupby(mandays_column, sort=False)))
+    for unit in sorted(units or set(row_groups) | set(mandays_groups)):
+        yield (
+            unit,
+            row_groups.get(unit, rows.iloc[0:0]),
+            mandays_groups.get(unit, mandays.iloc[0:0]),
+        )
+
+
+def run(
+    output,
+    by="project",
+    start_date=None,
+    end_date=None,
+    units=None,
+    statuses=None,
+    workers=None,
+):
+    """Generate every unit's reports; returns a summary of the run."""
+    started = time.perf_counter()
+    default_start, default_end = prewarm.previous_week()
+    start_date = start_date or default_start
+    end_date = end_date or default_end
+    statuses = prewarm.DEFAULT_STATUSES if statuses is None else statuses
+
+    # Everything is loaded once; workers only format and write
+    rows = db.load_timesheet_data(start_date, end_date, statuses=statuses)
+    rows["date"] = pd.to_datetime(rows["date"]).dt.tz_localize(None)
+    rows["man_hours"] = convert_timedeltas_to_hours(rows["man_hours"])
+    mandays = db.load_planned_vs_realized_mandays()
+    loaded = time.perf_counter()
+
+    base = os.path.join(output, by)
+    os.makedirs(base, exist_ok=True)
+    if by == "week" and not mandays.empty:
+        write_remaining_mandays(base, mandays)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            unit: executor.submit(
+                write_unit_reports,
+                os.path.join(base, _unit_name(unit)),
+                unit_rows,
+                unit_mandays,
+            )
+            for unit, unit_rows, unit_mandays in split_units(rows, mandays, by, units)
+        }
+        files = {unit: future.result() for unit, future in futures.items()}
+
+    return {
+        "by": by,
+        "start_date": str(start_date),
+        "end_date": str(end_date),
+        "units": len(files),
+        "files": sum(len(names) for names in files.values()),
+        "load_seconds": loaded - started,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate report files in batch.")
+    parser.add_argument("output", help="directory to write the reports to")
+    parser.add_argument(
+        "--by", choices=["project", "employee", "week"], default="project"
+    )
+    parser.add_argument("--start", type=pd.Timestamp, help="first day (inclusive)")
+    parser.add_argument("--end", type=pd.Timestamp, help="last day (inclusive)")
+    parser.add_argument(
+        "--units", nargs="+", help="only these project codes, employees or weeks"
+    )
+    parser.add_argument("--statuses", nargs="+", help="timesheet statuses to keep")
+    parser.add_argument("--workers", type=int, help="processes (default: CPUs)")
+    args = parser.parse_args()
+
+    summary = run(
+        args.output,
+        by=args.by,
+        start_date=args.start.date() if args.start is not None else None,
+        end_date=args.end.date() if args.end is not None else None,
+        units=args.units,
+        statuses=args.statuses,
+        workers=args.workers,
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
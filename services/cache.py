@@ -0,0 +1,186 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import pandas as pd
+
+from services.flight import SingleFlight
+
+
+def _as_date(value) -> date:
+    return pd.Timestamp(value).date()
+
+
+def _start_of_week(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+class PartitionCache:
+    """
+    Day-partitioned, in-process cache for date-range query results.
+
+    A range request is answered from the days already cached; only the
+    missing days are fetched, one query per contiguous gap. Days in a closed
+    ISO week (before the current one) never expire, more recent days expire
+    after ``recent_ttl`` seconds. Once the cached frames exceed ``max_bytes``
+    the least recently used days are evicted.
+
+    Concurrent requests missing the same days of the same namespace share a
+    single fetch. With a ``shared`` result cache (see services.shared_cache),
+    fetched runs are also looked up in and published to it, so other
+    processes can reuse them.
+    """
+
+    def __init__(self, max_bytes, recent_ttl, shared=None):
+        self.max_bytes = max_bytes
+        self.recent_ttl = recent_ttl
+        self.shared = shared
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "fetches": 0}
+        self._flights = SingleFlight()
+
+    def get_range(self, namespace, start_date, end_date, fetch, date_column="date"):
+        """
+        Return rows for ``start_date``..``end_date`` (inclusive).
+
+        ``fetch(start, end)`` must return a DataFrame for an inclusive date
+        range; ``namespace`` separates results of different queries/filters.
+        """
+        start_date, end_date = _as_date(start_date), _as_date(end_date)
+        if start_date > end_date:
+            return fetch(start_date, end_date)
+
+        days = [
+            start_date + timedelta(days=offset)
+            for offset in range((end_date - start_date).days + 1)
+        ]
+        frames = {}
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            for day in days:
+                entry = self._entries.get((namespace, day))
+                if entry is not None and (entry[2] is None or entry[2] > now):
+                    self._entries.move_to_end((namespace, day))
+                    frames[day] = entry[0]
+                    self._stats["hits"] += 1
+                else:
+                    if entry is not None:
+                        self._remove((namespace, day))
+                    missing.append(day)
+                    self._stats["misses"] += 1
+
+        for run_start, run_end in _contiguous_runs(missing):
+            parts = self._flights.do(
+                (namespace, run_start, run_end),
+                lambda: self._fetch_run(
+                    namespace, fetch, run_start, run_end, date_column
+                ),
+            )
+            frames.update(parts)
+
+        return pd.concat([frames[day] for day in days], ignore_index=True)
+
+    def _fetch_run(self, namespace, fetch, run_start, run_end, date_column):
+        if self.shared is None:
+            fetched = fetch(run_start, run_end)
+        else:
+            fetched = self.shared.get_or_fetch(
+                (namespace, run_start, run_end),
+                lambda: fetch(run_start, run_end),
+                self._ttl(run_end),
+            )
+        with self._lock:
+            self._stats["fetches"] += 1
+        parts = _split_by_day(fetched, date_column, run_start, run_end)
+        for day, frame in parts.items():
+            self._put((namespace, day), frame)
+        return parts
+
+    def contains(self, namespace, start_date, end_date):
+        """Whether every day of the range is cached and fresh."""
+        start_date, end_date = _as_date(start_date), _as_date(end_date)
+        now = time.monotonic()
+        with self._lock:
+            for offset in range((end_date - start_date).days + 1):
+                entry = self._entries.get(
+                    (namespace, start_date + timedelta(days=offset))
+                )
+                if entry is None or (entry[2] is not None and entry[2] <= now):
+                    return False
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["partitions"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        stats["coalesced"] = self._flights.stats()["coalesced"]
+        return stats
+
+    def _ttl(self, day):
+        """Seconds until days up to ``day`` expire, None for closed weeks."""
+        if day >= _start_of_week(date.today()):
+            return self.recent_ttl
+        return None
+
+    def _put(self, key, frame):
+        nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+        ttl = self._ttl(key[1])
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (frame, nbytes, expires_at)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def _remove(self, key):
+        _, nbytes, _ = self._entries.pop(key)
+        self._bytes -= nbytes
+
+
+def _contiguous_runs(days):
+    runs = []
+    for day in days:
+        if runs and day - runs[-1][1] == timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return [tuple(run) for run in runs]
+
+
+def _split_by_day(df, date_column, run_start, run_end):
+    """
+    Split ``df`` into one frame per day of ``run_start``..``run_end``.
+
+    Every day of the run gets an entry (possibly empty) so that days without
+    rows are cached too. Rows are clamped into the run because the database
+    already decided they belong to it.
+    """
+    empty = df.iloc[0:0]
+    parts = {
+        run_start + timedelta(days=offset): empty
+        for offset in range((run_end - run_start).days + 1)
+    }
+    if df.empty:
+        return parts
+    row_days = pd.to_datetime(df[date_column])
+    if row_days.dt.tz is not None:
+        row_days = row_days.dt.tz_localize(None)
+    row_days = row_days.dt.normalize().clip(
+        pd.Timestamp(run_start), pd.Timestamp(run_end)
+    )
+    for day, frame in df.groupby(row_days, sort=False):
+        parts[day.date()] = frame.reset_index(drop=True)
+    return parts
@@ -1,60 +1,170 @@
+import atexit
+import hashlib
+import heapq
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import config
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from services.cache import PartitionCache
+from services.flight import QueryLimiter, SingleFlight
+from utils import convert_timedeltas_to_hours
+
+logger = logging.getLogger(__name__)
+
+_engine = None
+_engine_lock = threading.Lock()
+
+TIMESHEET_ORDER = ["code", "date", "project", "module", "status", "billable"]
+TIMESHEET_COLUMNS = TIMESHEET_ORDER + ["man_hours", "name", "project_code"]
+
+# Full-range report queries go through query_limiter so a burst of sessions
+# queues in the process rather than exhausting the pool; identical
+# uncached queries are coalesced by the cache and by report_flights
+query_limiter = QueryLimiter(config.QUERY_CONCURRENCY)
+report_flights = SingleFlight()
+
+_stats_lock = threading.Lock()
+_wait_stats = {
+    "checkouts": 0,
+    "timeouts": 0,
+    "wait_seconds_total": 0.0,
+    "wait_seconds_max": 0.0,
+}
+
+
+class _TimedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            with _stats_lock:
+                _wait_stats["timeouts"] += 1
+            raise
+        waited = time.perf_counter() - started
+        with _stats_lock:
+            _wait_stats["checkouts"] += 1
+            _wait_stats["wait_seconds_total"] += waited
+            _wait_stats["wait_seconds_max"] = max(
+                _wait_stats["wait_seconds_max"], waited
+            )
+        return conn
+
+
+def _create_engine() -> Engine:
+    engine = create_engine(
+        config.SQLALCHEMY_DATABASE_URL,
+        poolclass=_TimedQueuePool,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+        connect_args={
+            "options": f"-c statement_timeout={config.DB_STATEMENT_TIMEOUT_MS}"
+        },
+    )
+    return engine
 
 
 def get_engine() -> Engine:
-    return create_engine(config.SQLALCHEMY_DATABASE_URL, pool_size=10, max_overflow=20)
+    """
+    Return the process-wide engine, creating it on first use.
 
+    Streamlit re-executes page scripts on every interaction but imports this
+    module once per process, so all sessions and pages share one pool.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine()
+    return _engine
 
-def load_timesheet_data(start_date, end_date):
-    engine = get_engine()
-    query = """
-        SELECT employee_code as code, 
-               timesheet.date as date, 
-               CASE WHEN ops_project.project_name IS NOT NULL 
-                    THEN ops_project.project_name 
-                    ELSE NULL END as project, 
-               CASE WHEN ops_static_module.module_name IS NOT NULL 
-                    THEN ops_static_module.module_name 
-                    WHEN ops_general_module.module_name IS NOT NULL
-                    THEN ops_general_module.module_name
-                    ELSE module.module_name END as module, 
-               tsp.parameter_name as status, 
-               'Billable' as billable, 
-               timesheet."manHoursBillable" as man_hours, 
-               first_name || ' ' || last_name as name, 
-               CASE WHEN project.project_code IS NOT NULL 
-                    THEN project.project_code 
-                    ELSE NULL END as project_code 
-        FROM employee 
-        JOIN job ON employee.job_id = job.id 
-        JOIN timesheet ON employee.id = timesheet.employee_id 
-        JOIN ops_project ON timesheet.ops_project_id = ops_project.id 
-        JOIN timesheet_status ON timesheet.timesheet_status_id = timesheet_status.id 
-        JOIN parameter tsp ON timesheet_status.status_id = tsp.id 
-        LEFT JOIN project ON ops_project.project_id = project.id 
-        LEFT JOIN ops_static_module ON timesheet.ops_static_module_id = ops_static_module.id 
-        LEFT JOIN ops_project_module ON timesheet.ops_project_module_id = ops_project_module.id 
-        LEFT JOIN "module" ON ops_project_module.module_id = "module".id 
-        LEFT JOIN ops_general_module ON ops_project_module.ops_general_module_id = ops_general_module.id
-        WHERE timesheet."manHoursBillable" > '00:00' 
-        AND timesheet.date BETWEEN %(start_date)s AND %(end_date)s
-        UNION ALL 
+
+def dispose_engine():
+    """Close every pooled connection; the next get_engine() starts fresh."""
+    global _engine
+    with _engine_lock:
+        engine, _engine = _engine, None
+    if engine is not None:
+        engine.dispose()
+
+
+atexit.register(dispose_engine)
+
+
+def check_health() -> bool:
+    """Run a trivial query through the pool and report whether it succeeded."""
+    try:
+        with get_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return True
+    except Exception:
+        return False
+
+
+def set_local_statement_timeout(conn, timeout_ms):
+    """
+    Replace the pool's statement_timeout for the rest of ``conn``'s current
+    transaction, e.g. for background jobs allowed to run longer.
+    """
+    conn.execute(
+        text("SELECT set_config('statement_timeout', :timeout, true)"),
+        {"timeout": str(timeout_ms)},
+    )
+
+
+def get_pool_stats():
+    """
+    Snapshot of the shared pool, for sizing it against peak load.
+    """
+    with _engine_lock:
+        engine = _engine
+    with _stats_lock:
+        stats = dict(_wait_stats)
+    checkouts = stats["checkouts"]
+    stats["wait_seconds_avg"] = (
+        stats["wait_seconds_total"] / checkouts if checkouts else 0.0
+    )
+    if engine is None:
+        stats.update({"pool_size": 0, "checked_in": 0, "checked_out": 0, "overflow": 0})
+        return stats
+    pool = engine.pool
+    stats.update(
+        {
+            "pool_size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+        }
+    )
+    return stats
+
+
+_TIMESHEET_SELECT = """
         SELECT employee_code as code, 
                timesheet.date as date, 
-               CASE WHEN ops_project.project_name IS NOT NULL 
-                    THEN ops_project.project_name 
-                    ELSE NULL END as project, 
+               COALESCE(project_mapping.project_name, ops_project.project_name) as project, 
                CASE WHEN ops_static_module.module_name IS NOT NULL 
                     THEN ops_static_module.module_name 
                     WHEN ops_general_module.module_name IS NOT NULL
                     THEN ops_general_module.module_name
                     ELSE module.module_name END as module, 
                tsp.parameter_name as status, 
-               'Non-Billable' as billable, 
-               "manHoursNonBillable" as man_hours, 
+               hours.billable as billable, 
+               hours.man_hours as man_hours, 
                first_name || ' ' || last_name as name, 
                CASE WHEN project.project_code IS NOT NULL 
                     THEN project.project_code 
@@ -66,26 +176,589 @@ def load_timesheet_data(start_date, end_date):
         JOIN timesheet_status ON timesheet.timesheet_status_id = timesheet_status.id 
         JOIN parameter tsp ON timesheet_status.status_id = tsp.id 
         LEFT JOIN project ON ops_project.project_id = project.id 
+        LEFT JOIN project_mapping ON project.project_code = project_mapping.project_code 
         LEFT JOIN ops_static_module ON timesheet.ops_static_module_id = ops_static_module.id 
         LEFT JOIN ops_project_module ON timesheet.ops_project_module_id = ops_project_module.id 
         LEFT JOIN "module" ON ops_project_module.module_id = "module".id 
         LEFT JOIN ops_general_module ON ops_project_module.ops_general_module_id = ops_general_module.id
-        WHERE timesheet."manHoursNonBillable" > '00:00' 
-        AND timesheet.date BETWEEN %(start_date)s AND %(end_date)s
-        ORDER BY code, date, project, module, status, billable
+        CROSS JOIN LATERAL (
+            VALUES ('Billable', timesheet."manHoursBillable"),
+                   ('Non-Billable', timesheet."manHoursNonBillable")
+        ) AS hours(billable, man_hours)
+        WHERE (timesheet."manHoursBillable" > '00:00' 
+               OR timesheet."manHoursNonBillable" > '00:00')
+        AND hours.man_hours > '00:00' 
+        AND timesheet.date BETWEEN %(start_date)s AND %(end_date)s{filters}
+"""
+
+_TIMESHEET_QUERY = (
+    _TIMESHEET_SELECT
+    + """        ORDER BY code, date, project, module, status, billable
+"""
+)
+
+_TIMESHEET_SUMMARY_QUERY = (
     """
-    df = pd.read_sql(
-        query, engine, params={"start_date": start_date, "end_date": end_date}
+        SELECT entries.name as name, 
+               entries.date as date, 
+               (SUM(EXTRACT(epoch FROM entries.man_hours)) / 3600)::float8 as man_hours 
+        FROM ("""
+    + _TIMESHEET_SELECT
+    + """        ) entries
+        GROUP BY entries.name, entries.date
+        ORDER BY name, date
+"""
+)
+
+
+def timesheet_filters(
+    statuses=None, billable=None, project_codes=None, employee_code=None
+):
+    """
+    Normalize optional timesheet filters into a hashable tuple.
+
+    Empty values mean "no filter", matching the sidebar where an empty
+    multiselect shows everything.
+    """
+    return (
+        tuple(sorted(statuses)) if statuses else None,
+        tuple(sorted(billable)) if billable else None,
+        tuple(sorted(project_codes)) if project_codes else None,
+        employee_code.strip() if employee_code and employee_code.strip() else None,
+    )
+
+
+def mapping_version():
+    """
+    Version of project_mapping: its row count and last update. Results that
+    carry mapped project names are cached under it, so an edit saved by any
+    process is picked up everywhere; deletes change only the count.
+    """
+    with get_engine().connect() as conn:
+        count, updated_at = conn.execute(
+            text("SELECT count(*), max(updated_at) FROM project_mapping")
+        ).one()
+    return count, updated_at and updated_at.isoformat()
+
+
+def _timesheet_where(filters):
+    statuses, billable, project_codes, employee_code = filters
+    conditions = []
+    params = {}
+    if billable:
+        conditions.append("hours.billable IN %(billable)s")
+        params["billable"] = billable
+    if statuses:
+        conditions.append("tsp.parameter_name IN %(statuses)s")
+        params["statuses"] = statuses
+    if project_codes:
+        conditions.append("project.project_code IN %(project_codes)s")
+        params["project_codes"] = project_codes
+    if employee_code:
+        conditions.append("employee_code ILIKE %(employee_code)s ESCAPE '\\'")
+        escaped = (
+            employee_code.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        )
+        params["employee_code"] = f"%{escaped}%"
+    sql = "".join(f"\n        AND {condition}" for condition in conditions)
+    return sql, params
+
+
+def load_timesheet_data(
+    start_date,
+    end_date,
+    statuses=None,
+    billable=None,
+    project_codes=None,
+    employee_code=None,
+):
+    """
+    Load timesheet rows for a date range, reusing cached days where possible.
+
+    The optional filters are applied in SQL so only displayed rows are
+    transferred; ``employee_code`` is a case-insensitive substring match.
+    When QUERY_PARALLELISM is above 1, ranges spanning several slices are
+    loaded with load_timesheet_data_sliced.
+    """
+    if (
+        config.QUERY_PARALLELISM > 1
+        and len(date_slices(start_date, end_date, config.QUERY_SLICE_MONTHS)) > 1
+    ):
+        return load_timesheet_data_sliced(
+            start_date, end_date, statuses, billable, project_codes, employee_code
+        )
+    filters = timesheet_filters(statuses, billable, project_codes, employee_code)
+    return _load_timesheet_range(start_date, end_date, filters, mapping_version())
+
+
+def _load_timesheet_range(start_date, end_date, filters, version):
+    df = timesheet_cache.get_range(
+        ("timesheet", filters, version),
+        start_date,
+        end_date,
+        lambda start, end: _query_timesheet_data(start, end, filters),
+    )
+    return df.sort_values(TIMESHEET_ORDER, kind="stable", ignore_index=True)
+
+
+def date_slices(start_date, end_date, months=1):
+    """Split an inclusive date range at every ``months``-th month boundary."""
+    start = pd.Timestamp(start_date).normalize()
+    end = pd.Timestamp(end_date).normalize()
+    slices = []
+    while start <= end:
+        next_start = (start + pd.offsets.MonthBegin(months)).normalize()
+        last = min(next_start - pd.Timedelta(days=1), end)
+        slices.append((start.date(), last.date()))
+        start = next_start
+    return slices
+
+
+def load_timesheet_data_sliced(
+    start_date,
+    end_date,
+    statuses=None,
+    billable=None,
+    project_codes=None,
+    employee_code=None,
+    slice_months=None,
+    max_workers=None,
+):
+    """
+    load_timesheet_data, with the range split into month slices that are
+    queried concurrently over the shared connection pool.
+
+    Each slice is cached and sorted on its own; as the slices are date
+    ordered, the sorted slices are combined with a k-way merge on ``code``
+    instead of sorting the whole result again.
+    """
+    filters = timesheet_filters(statuses, billable, project_codes, employee_code)
+    slices = date_slices(
+        start_date, end_date, slice_months or config.QUERY_SLICE_MONTHS
     )
+    workers = min(max_workers or config.QUERY_PARALLELISM, len(slices))
+    version = mapping_version()
+    if workers <= 1:
+        frames = [
+            _load_timesheet_range(start, end, filters, version) for start, end in slices
+        ]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            frames = list(
+                executor.map(
+                    lambda bounds: _load_timesheet_range(*bounds, filters, version),
+                    slices,
+                )
+            )
+    return merge_sorted_slices(frames)
+
+
+def _code_runs(frame, index):
+    """Yield ``(key, slice_index, start, stop)`` for each run of one code."""
+    codes = frame["code"].to_numpy()
+    if len(codes) == 0:
+        return
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    stops = np.r_[starts[1:], len(codes)]
+    for start, stop in zip(starts, stops):
+        code = codes[start]
+        # pandas sorts missing codes last
+        key = (True, "") if pd.isna(code) else (False, code)
+        yield key, index, start, stop
+
+
+def merge_sorted_slices(frames):
+    """
+    Combine frames that are each sorted by TIMESHEET_ORDER and cover
+    consecutive date ranges into one frame in the same global order.
+
+    Within one code, rows of an earlier slice precede those of a later one,
+    so merging whole runs of equal ``code`` is enough.
+    """
+    if len(frames) == 1:
+        return frames[0]
+    offsets = np.cumsum([0] + [len(frame) for frame in frames])
+    merged = heapq.merge(*(_code_runs(frame, i) for i, frame in enumerate(frames)))
+    positions = [
+        np.arange(offsets[i] + start, offsets[i] + stop) for _, i, start, stop in merged
+    ]
+    combined = pd.concat(frames, ignore_index=True)
+    if not positions:
+        return combined
+    return combined.take(np.concatenate(positions)).reset_index(drop=True)
+
+
+def _replica():
+    """services.replica while it is synced and recent enough, else None."""
+    if not config.REPLICA_DIR:
+        return None
+    # Imported on demand: pyarrow's dataset/parquet modules are slow to load
+    from services import replica
+
+    return replica if replica.available() else None
+
+
+def _from_replica(read):
+    """
+    ``read(replica)`` while the replica is usable, else None. A failing
+    replica read is logged and also returns None, so callers query Postgres.
+    """
+    replica = _replica()
+    if replica is None:
+        return None
+    try:
+        return read(replica)
+    except Exception:
+        logger.exception("Reading the timesheet replica failed, using Postgres")
+        return None
+
+
+def replica_synced_at():
+    """Last sync of the replica when the loaders read from it, else None."""
+    replica = _replica()
+    return replica.synced_at() if replica is not None else None
+
+
+def _query_timesheet_data(start_date, end_date, filters=timesheet_filters()):
+    df = _from_replica(
+        lambda replica: replica.query_timesheet_data(start_date, end_date, filters)
+    )
+    if df is not None:
+        return df
+    engine = get_engine()
+    where, params = _timesheet_where(filters)
+    query = _TIMESHEET_QUERY.format(filters=where)
+    params.update({"start_date": start_date, "end_date": end_date})
+    with query_limiter.slot():
+        df = pd.read_sql(query, engine, params=params)
     return df
 
 
-def load_planned_vs_realized_mandays():
+def stream_timesheet_data(
+    start_date,
+    end_date,
+    statuses=None,
+    billable=None,
+    project_codes=None,
+    employee_code=None,
+    chunk_size=10000,
+):
+    """
+    Yield load_timesheet_data's rows as DataFrames of at most ``chunk_size``.
+
+    Rows are read through a server-side cursor and bypass the cache, so
+    memory stays bounded by the chunk size whatever the range length.
     """
-    Load planned vs realized mandays comparison using CTEs
+    filters = timesheet_filters(statuses, billable, project_codes, employee_code)
+    where, params = _timesheet_where(filters)
+    query = _TIMESHEET_QUERY.format(filters=where)
+    params.update({"start_date": start_date, "end_date": end_date})
+    with query_limiter.slot(), get_engine().connect() as conn:
+        conn = conn.execution_options(stream_results=True, max_row_buffer=chunk_size)
+        yield from pd.read_sql(query, conn, params=params, chunksize=chunk_size)
+
+
+_TIMESHEET_STRING_COLUMNS = [
+    "code",
+    "project",
+    "module",
+    "status",
+    "billable",
+    "name",
+    "project_code",
+]
+
+
+def compact_timesheet_chunk(chunk):
+    """
+    Convert a raw timesheet frame to an Arrow table with compact types:
+    dictionary-encoded strings, date32 dates and float hours.
     """
+    import pyarrow as pa
+
+    dates = pd.to_datetime(chunk["date"])
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    arrays = {}
+    for column in TIMESHEET_COLUMNS:
+        if column == "date":
+            arrays[column] = pa.array(
+                dates.to_numpy(dtype="datetime64[D]"), type=pa.date32()
+            )
+        elif column == "man_hours":
+            arrays[column] = pa.array(
+                convert_timedeltas_to_hours(chunk["man_hours"]).to_numpy(),
+                type=pa.float64(),
+            )
+        else:
+            arrays[column] = pa.array(
+                chunk[column], type=pa.string(), from_pandas=True
+            ).dictionary_encode()
+    return pa.table(arrays)
+
+
+def compact_timesheet_frame(tables):
+    """Combine compact chunk tables into one frame with categorical strings."""
+    import pyarrow as pa
+
+    tables = list(tables)
+    if not tables:
+        tables = [compact_timesheet_chunk(pd.DataFrame(columns=TIMESHEET_COLUMNS))]
+    table = pa.concat_tables(tables).unify_dictionaries().combine_chunks()
+    return table.to_pandas(
+        types_mapper={pa.date32(): pd.ArrowDtype(pa.date32())}.get,
+        self_destruct=True,
+    )
+
+
+def load_timesheet_data_compact(
+    start_date,
+    end_date,
+    statuses=None,
+    billable=None,
+    project_codes=None,
+    employee_code=None,
+    chunk_size=50000,
+):
+    """
+    Memory-lean variant of load_timesheet_data for long ranges.
+
+    Rows are read in chunks through a server-side cursor and each chunk is
+    converted to compact Arrow types before the next one is fetched, so the
+    object-dtype frame never exists for the whole range. Strings come back
+    as categoricals, ``date`` as date32 and ``man_hours`` as float hours.
+    """
+    chunks = stream_timesheet_data(
+        start_date,
+        end_date,
+        statuses=statuses,
+        billable=billable,
+        project_codes=project_codes,
+        employee_code=employee_code,
+        chunk_size=chunk_size,
+    )
+    return compact_timesheet_frame(compact_timesheet_chunk(c) for c in chunks)
+
+
+def load_timesheet_summary(
+    start_date,
+    end_date,
+    statuses=None,
+    billable=None,
+    project_codes=None,
+    employee_code=None,
+):
+    """
+    Hours per (name, date) for the same filters as load_timesheet_data.
+
+    Hours are summed in SQL as float hours, so only the small Person x Date
+    result is transferred.
+    """
+    filters = timesheet_filters(statuses, billable, project_codes, employee_code)
+    df = timesheet_cache.get_range(
+        ("timesheet_summary", filters),
+        start_date,
+        end_date,
+        lambda start, end: _query_timesheet_summary(start, end, filters),
+    )
+    return df.sort_values(["name", "date"], kind="stable", ignore_index=True)
+
+
+def timesheet_summary_cached(
+    start_date,
+    end_date,
+    statuses=None,
+    billable=None,
+    project_codes=None,
+    employee_code=None,
+):
+    """Whether load_timesheet_summary would answer entirely from the cache."""
+    filters = timesheet_filters(statuses, billable, project_codes, employee_code)
+    return timesheet_cache.contains(
+        ("timesheet_summary", filters), start_date, end_date
+    )
+
+
+def _query_timesheet_summary(start_date, end_date, filters=timesheet_filters()):
+    df = _from_replica(
+        lambda replica: replica.query_timesheet_summary(start_date, end_date, filters)
+    )
+    if df is not None:
+        return df
+    engine = get_engine()
+    where, params = _timesheet_where(filters)
+    query = _TIMESHEET_SUMMARY_QUERY.format(filters=where)
+    params.update({"start_date": start_date, "end_date": end_date})
+    with query_limiter.slot():
+        df = pd.read_sql(query, engine, params=params)
+    return df
+
+
+# Detail-table pages read the same rows plus the timesheet id, which makes
+# the keyset unique
+_TIMESHEET_PAGE_SELECT = _TIMESHEET_SELECT.replace(
+    "SELECT employee_code as code,",
+    "SELECT timesheet.id as entry_id, employee_code as code,",
+    1,
+)
+
+TIMESHEET_SORT_COLUMNS = TIMESHEET_ORDER + ["name", "project_code", "man_hours"]
+_NULLABLE_SORT_COLUMNS = {"code", "project", "module", "name", "project_code"}
+
+
+def _sort_key(column):
+    # Keyset comparisons need NULL-free keys; NULL text sorts as ''
+    if column in _NULLABLE_SORT_COLUMNS:
+        return f"COALESCE(entries.{column}, '')"
+    return f"entries.{column}"
+
+
+def load_timesheet_page(
+    start_date,
+    end_date,
+    sort_column="code",
+    descending=False,
+    page_size=50,
+    after=None,
+    offset=0,
+    statuses=None,
+    billable=None,
+    project_codes=None,
+    employee_code=None,
+):
+    """
+    One page of load_timesheet_data's rows, fetched with keyset pagination.
+
+    Rows are ordered by ``sort_column``, then the usual ORDER BY columns and
+    the timesheet id. Pass the cursor returned for the previous page as
+    ``after`` to continue from it; without a cursor, ``offset`` rows are
+    skipped instead. Returns ``(page_df, cursor)``.
+    """
+    if sort_column not in TIMESHEET_SORT_COLUMNS:
+        raise ValueError(f"Cannot sort timesheet rows by {sort_column!r}")
+    filters = timesheet_filters(statuses, billable, project_codes, employee_code)
+    where, params = _timesheet_where(filters)
+    columns = [sort_column] + [c for c in TIMESHEET_ORDER if c != sort_column]
+    keys = [_sort_key(column) for column in columns] + ["entries.entry_id"]
+    direction = "DESC" if descending else "ASC"
+
+    keyset = ""
+    if after is not None:
+        placeholders = ", ".join(f"%(key_{i})s" for i in range(len(keys)))
+        keyset = (
+            f"WHERE ({', '.join(keys)}) {'<' if descending else '>'} ({placeholders})"
+        )
+        params.update({f"key_{i}": value for i, value in enumerate(after)})
+        offset = 0
+
+    key_columns = ", ".join(f"{key} as key_{i}" for i, key in enumerate(keys))
+    query = f"""
+        SELECT entries.*, {key_columns}
+        FROM ({_TIMESHEET_PAGE_SELECT.format(filters=where)}) entries
+        {keyset}
+        ORDER BY {", ".join(f"{key} {direction}" for key in keys)}
+        LIMIT %(page_size)s OFFSET %(offset)s
+    """
+    params.update(
+        {
+            "start_date": start_date,
+            "end_date": end_date,
+            "page_size": page_size,
+            "offset": offset,
+        }
+    )
+    df = pd.read_sql(query, get_engine(), params=params)
+    key_names = [f"key_{i}" for i in range(len(keys))]
+    # to_dict boxes numpy scalars into Python values psycopg2 can adapt
+    cursor = (
+        tuple(df[key_names].iloc[-1:].to_dict("records")[0].values())
+        if len(df)
+        else None
+    )
+    return df[TIMESHEET_COLUMNS], cursor
+
+
+def count_timesheet_rows(
+    start_date,
+    end_date,
+    statuses=None,
+    billable=None,
+    project_codes=None,
+    employee_code=None,
+):
+    """Number of rows load_timesheet_data would return, counted per day."""
+    filters = timesheet_filters(statuses, billable, project_codes, employee_code)
+    df = timesheet_cache.get_range(
+        ("timesheet_counts", filters),
+        start_date,
+        end_date,
+        lambda start, end: _query_timesheet_counts(start, end, filters),
+    )
+    return int(df["rows"].sum()) if len(df) else 0
+
+
+_TIMESHEET_COUNTS_QUERY = (
+    """
+        SELECT entries.date as date, count(*) as rows
+        FROM ("""
+    + _TIMESHEET_SELECT
+    + """        ) entries
+        GROUP BY entries.date
+"""
+)
+
+
+def _query_timesheet_counts(start_date, end_date, filters=timesheet_filters()):
+    engine = get_engine()
+    where, params = _timesheet_where(filters)
+    query = _TIMESHEET_COUNTS_QUERY.format(filters=where)
+    params.update({"start_date": start_date, "end_date": end_date})
+    df = pd.read_sql(query, engine, params=params)
+    return df
+
+
+def load_timesheet_projects(start_date, end_date):
+    """
+    Distinct projects with timesheet entries in a date range, for filter options.
+    """
+    df = timesheet_cache.get_range(
+        ("timesheet_projects", mapping_version()),
+        start_date,
+        end_date,
+        _query_timesheet_projects,
+    )
+    return df.drop_duplicates(subset=["project_code"]).drop(columns=["date"])
+
+
+_TIMESHEET_PROJECTS_QUERY = """
+        SELECT DISTINCT timesheet.date as date,
+               project.project_code as project_code,
+               COALESCE(project_mapping.project_name, ops_project.project_name) as project
+        FROM timesheet
+        JOIN ops_project ON timesheet.ops_project_id = ops_project.id
+        JOIN project ON ops_project.project_id = project.id
+        LEFT JOIN project_mapping ON project.project_code = project_mapping.project_code
+        WHERE timesheet.date BETWEEN %(start_date)s AND %(end_date)s
+        ORDER BY project_code
+"""
+
+
+def _query_timesheet_projects(start_date, end_date):
+    df = _from_replica(
+        lambda replica: replica.query_timesheet_projects(start_date, end_date)
+    )
+    if df is not None:
+        return df
     engine = get_engine()
-    query = """
+    df = pd.read_sql(
+        _TIMESHEET_PROJECTS_QUERY,
+        engine,
+        params={"start_date": start_date, "end_date": end_date},
+    )
+    return df
+
+
+_PLANNED_VS_REALIZED_QUERY = """
         WITH planned AS (
           SELECT
           ANY_VALUE(p.project_code) project,
@@ -99,7 +772,7 @@ def load_planned_vs_realized_mandays():
           LEFT JOIN client c ON c.id = p.client_id 
           LEFT JOIN ops_project op ON op.project_id = p.id
           LEFT JOIN mandays m ON m.ops_project_id = op.id
-          LEFT JOIN employee e ON e.id = m.employee_id 
+          LEFT JOIN employee e ON e.id = m.employee_id {planned_filter}
           GROUP BY m.ops_project_id, m.employee_id
         ),
         realized AS (
@@ -117,7 +790,7 @@ def load_planned_vs_realized_mandays():
           LEFT JOIN timesheet_status ts ON t.timesheet_status_id = ts.id
           JOIN project p ON p.id = op.project_id
           LEFT JOIN parameter tss_param ON ts.status_id = tss_param.id
-          WHERE tss_param.parameter_name IN ('Modified','Approved')
+          WHERE tss_param.parameter_name IN ('Modified','Approved') {realized_filter}
           GROUP BY op.id, e.id
         )
         SELECT
@@ -125,9 +798,9 @@ def load_planned_vs_realized_mandays():
           p.ops_project_id,
           p.total_mandays,
           p.employee_code,
-          COALESCE(r.billable_mandays, 0) AS total_realized_mandays,
+          COALESCE(r.billable_mandays, 0) AS realized_billable_mandays,
           (p.billable_mandays - COALESCE(r.billable_mandays, 0)) AS remaining_billable_mandays,
-          COALESCE(r.non_billable_mandays, 0) AS total_realized_mandays,
+          COALESCE(r.non_billable_mandays, 0) AS realized_non_billable_mandays,
           (p.non_billable_mandays - COALESCE(r.non_billable_mandays, 0)) AS remaining_non_billable_mandays,
           COALESCE(r.total_mandays, 0) AS total_realized_mandays,
           (p.total_mandays - COALESCE(r.total_mandays, 0)) AS remaining_mandays
@@ -135,8 +808,255 @@ def load_planned_vs_realized_mandays():
         LEFT JOIN realized r
             ON p.ops_project_id = r.ops_project_id
             AND p.employee_code = r.employee_code
-        ORDER BY p.ops_project_id
+"""
+
+# Reads the rollup table or, before it is built, the CTEs above
+_PLANNED_VS_REALIZED_SELECT = """
+        SELECT
+          rollup.project,
+          project_mapping.project_name,
+          rollup.ops_project_id,
+          rollup.total_mandays,
+          rollup.employee_code,
+          rollup.realized_billable_mandays AS total_realized_mandays,
+          rollup.remaining_billable_mandays,
+          rollup.realized_non_billable_mandays AS total_realized_mandays,
+          rollup.remaining_non_billable_mandays,
+          rollup.total_realized_mandays,
+          rollup.remaining_mandays
+        FROM {source}
+        LEFT JOIN project_mapping ON rollup.project = project_mapping.project_code
+        {where}
+        ORDER BY rollup.ops_project_id
+"""
+
+ROLLUP_TABLE = "report_planned_vs_realized"
+ROLLUP_STATE_TABLE = "report_rollup_state"
+ROLLUP_NAME = "planned_vs_realized"
+
+# Bump when cached frames change shape or meaning without a change to the
+# query texts, e.g. in the replica readers or the cache's own layout
+RESULT_VERSION = 1
+
+# Shared results outlive deploys on their volume, so their keys carry the
+# version of the queries that produced them
+RESULT_SCHEMA = hashlib.sha256(
+    "\n".join(
+        [
+            str(RESULT_VERSION),
+            _TIMESHEET_QUERY,
+            _TIMESHEET_SUMMARY_QUERY,
+            _TIMESHEET_COUNTS_QUERY,
+            _TIMESHEET_PROJECTS_QUERY,
+            _PLANNED_VS_REALIZED_QUERY,
+            _PLANNED_VS_REALIZED_SELECT,
+        ]
+    ).encode("utf-8")
+).hexdigest()[:16]
+
+shared_cache = None
+if config.SHARED_CACHE_DIR:
+    # Imported on demand, like services.replica: it loads pyarrow
+    from services.shared_cache import FileResultCache
+
+    shared_cache = FileResultCache(
+        config.SHARED_CACHE_DIR, config.SHARED_CACHE_MAX_BYTES, version=RESULT_SCHEMA
+    )
+timesheet_cache = PartitionCache(
+    config.CACHE_MAX_BYTES, config.CACHE_RECENT_TTL, shared=shared_cache
+)
+
+
+# Last planned-vs-realized result as
+# ((rollup refreshed_at, mapping version), loaded at, frame)
+_planned_vs_realized = None
+_planned_vs_realized_lock = threading.Lock()
+
+
+def clear_caches():
+    """Drop every cached report result of this process and the shared cache."""
+    global _planned_vs_realized
+    timesheet_cache.clear()
+    if shared_cache is not None:
+        shared_cache.clear()
+    with _planned_vs_realized_lock:
+        _planned_vs_realized = None
+
+
+def load_rollup_refreshed_at():
+    """
+    Time of the last planned-vs-realized rollup refresh, or None if the
+    rollup has never been built.
+    """
+    engine = get_engine()
+    with engine.connect() as conn:
+        exists = conn.execute(
+            text("SELECT to_regclass(:table) IS NOT NULL"),
+            {"table": ROLLUP_STATE_TABLE},
+        ).scalar()
+        if not exists:
+            return None
+        return conn.execute(
+            text(f"SELECT refreshed_at FROM {ROLLUP_STATE_TABLE} WHERE name = :name"),
+            {"name": ROLLUP_NAME},
+        ).scalar()
+
+
+def planned_vs_realized_version():
+    """
+    ``(rollup refreshed_at, mapping_version())``, the key planned-vs-realized
+    results are cached under. Pages read it once per render and pass it to
+    the functions below.
+    """
+    return load_rollup_refreshed_at(), mapping_version()
+
+
+def load_planned_vs_realized_mandays(
+    project_codes=None, employee_codes=None, version=None
+):
+    """
+    Load planned vs realized mandays per project and employee.
+
+    Reads the precomputed rollup maintained by services.rollup; until it has
+    been built once, the CTEs are evaluated live instead. ``project_name`` is
+    the mapped display name, or NULL for unmapped projects.
+
+    The unscoped result is kept until the rollup is refreshed or the mapping
+    changes (or for CACHE_RECENT_TTL seconds on the live path); concurrent
+    callers share one execution. With ``project_codes`` and/or ``employee_codes`` only those
+    rows are returned, filtered from the kept result when there is one and
+    otherwise computed by Postgres for that subset only. ``version`` is
+    planned_vs_realized_version(), read here when not given.
     """
+    global _planned_vs_realized
+    key = version or planned_vs_realized_version()
+    refreshed_at = key[0]
+    df = _cached_planned_vs_realized(key)
+    if project_codes or employee_codes:
+        if df is None:
+            return _query_planned_vs_realized_mandays(
+                refreshed_at, project_codes, employee_codes
+            )
+        mask = pd.Series(True, index=df.index)
+        if project_codes:
+            mask &= df["project"].isin(project_codes)
+        if employee_codes:
+            mask &= df["employee_code"].isin(employee_codes)
+        return df[mask].reset_index(drop=True)
+    if df is None:
+        df = report_flights.do(
+            ("planned_vs_realized", key),
+            lambda: _shared_planned_vs_realized(key),
+        )
+        with _planned_vs_realized_lock:
+            _planned_vs_realized = (key, time.monotonic(), df)
+    return df.copy()
+
+
+def _shared_planned_vs_realized(key):
+    refreshed_at, version = key
+    if shared_cache is None:
+        return _query_planned_vs_realized_mandays(refreshed_at)
+    # The rollup refresh time makes the key exact; live results age out
+    return shared_cache.get_or_fetch(
+        ("planned_vs_realized", refreshed_at and refreshed_at.isoformat(), version),
+        lambda: _query_planned_vs_realized_mandays(refreshed_at),
+        None if refreshed_at is not None else config.CACHE_RECENT_TTL,
+    )
 
-    df = pd.read_sql(query, engine)
+
+def planned_vs_realized_cached(version=None):
+    """Whether load_planned_vs_realized_mandays would answer from memory."""
+    key = version or planned_vs_realized_version()
+    return _cached_planned_vs_realized(key) is not None
+
+
+def _cached_planned_vs_realized(key):
+    with _planned_vs_realized_lock:
+        cached = _planned_vs_realized
+    if cached is None or cached[0] != key:
+        return None
+    if key[0] is None and time.monotonic() - cached[1] > config.CACHE_RECENT_TTL:
+        return None
+    return cached[2]
+
+
+def _planned_vs_realized_scope(project_codes, employee_codes, prefix):
+    """
+    Conditions restricting ``p.project_code``/``e.employee_code`` (or the
+    rollup's columns) to the given codes, and their parameters.
+    """
+    conditions = []
+    params = {}
+    if project_codes:
+        conditions.append(f"{prefix['project']} IN %(project_codes)s")
+        params["project_codes"] = tuple(project_codes)
+    if employee_codes:
+        conditions.append(f"{prefix['employee']} IN %(employee_codes)s")
+        params["employee_codes"] = tuple(employee_codes)
+    return conditions, params
+
+
+def _query_planned_vs_realized_mandays(
+    refreshed_at, project_codes=None, employee_codes=None
+):
+    engine = get_engine()
+    where = ""
+    if refreshed_at is not None:
+        source = f"{ROLLUP_TABLE} rollup"
+        conditions, params = _planned_vs_realized_scope(
+            project_codes,
+            employee_codes,
+            {"project": "rollup.project", "employee": "rollup.employee_code"},
+        )
+        if conditions:
+            where = "WHERE " + " AND ".join(conditions)
+    else:
+        # The scope is bound into both CTEs so only that subset is aggregated
+        conditions, params = _planned_vs_realized_scope(
+            project_codes,
+            employee_codes,
+            {"project": "p.project_code", "employee": "e.employee_code"},
+        )
+        live_query = _PLANNED_VS_REALIZED_QUERY.format(
+            planned_filter="WHERE " + " AND ".join(conditions) if conditions else "",
+            realized_filter="".join(f" AND {c}" for c in conditions),
+        )
+        source = f"({live_query}) rollup"
+    query = _PLANNED_VS_REALIZED_SELECT.format(source=source, where=where)
+
+    with query_limiter.slot():
+        df = pd.read_sql(query, engine, params=params or None)
     return df
+
+
+def load_remaining_mandays_options():
+    """
+    Selectable projects (``project_code``, ``project``: mapped or ops name)
+    and employees (``employee_code``, ``name``) for the Remaining Mandays page.
+    """
+    engine = get_engine()
+    projects = pd.read_sql(
+        """
+        SELECT project.project_code as project_code,
+               COALESCE(ANY_VALUE(project_mapping.project_name),
+                        MIN(ops_project.project_name),
+                        project.project_code) as project
+        FROM project
+        LEFT JOIN ops_project ON ops_project.project_id = project.id
+        LEFT JOIN project_mapping
+            ON project.project_code = project_mapping.project_code
+        GROUP BY project.project_code
+        ORDER BY project.project_code
+        """,
+        engine,
+    )
+    employees = pd.read_sql(
+        """
+        SELECT DISTINCT employee_code, first_name || ' ' || last_name as name
+        FROM employee
+        ORDER BY employee_code
+        """,
+        engine,
+    )
+    return projects, employees
@@ -0,0 +1,107 @@
+"""
+On-demand report exports built without materializing the full result.
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+
+from services import db
+from utils import convert_timedeltas_to_hours
+
+
+def write_timesheet_csv(fileobj, start_date, end_date, chunk_size=10000, **filters):
+    """
+    Write the filtered timesheet rows as CSV to a binary file object.
+
+    Rows are streamed from the database chunk by chunk, with man_hours as
+    float hours. Returns the number of rows written.
+    """
+    rows = 0
+    for chunk in db.stream_timesheet_data(
+        start_date, end_date, chunk_size=chunk_size, **filters
+    ):
+        chunk["date"] = pd.to_datetime(chunk["date"]).dt.tz_localize(None)
+        chunk["man_hours"] = convert_timedeltas_to_hours(chunk["man_hours"])
+        fileobj.write(chunk.to_csv(index=False, header=rows == 0).encode("utf-8"))
+        rows += len(chunk)
+    if rows == 0:
+        fileobj.write(
+            pd.DataFrame(columns=db.TIMESHEET_COLUMNS)
+            .to_csv(index=False)
+            .encode("utf-8")
+        )
+    return rows
+
+
+def create_xlsx_with_custom_headers(wide):
+    """
+    Create an XLSX file with custom 2-row headers:
+    1st row: Employee codes
+    2nd row: 'Bill' and 'Non Bill' for each employee
+
+    ``wide`` is the reports.remaining_mandays_wide() table. Uses openpyxl's
+    write-only mode: rows are streamed from one NumPy block and column widths
+    are computed from the block up front, since write-only sheets cannot be
+    revisited.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font
+    from openpyxl.utils import get_column_letter
+
+    # Columns come in (employee, Bill), (employee, NonBill) pairs
+    header_row1 = ["Project Code", "Project Name"]
+    header_row2 = ["", ""]  # Empty for project columns
+    for emp_code, kind in wide.columns:
+        header_row1.append(emp_code if kind == "Bill" else "")
+        header_row2.append("Bill" if kind == "Bill" else "Non Bill")
+
+    info_df = wide.index.to_frame(index=False)
+    info = info_df.astype(object).where(info_df.notna(), None).to_numpy()
+    values = wide.to_numpy(dtype=float)
+
+    # Column widths from the longest rendered value, headers included
+    lengths = np.char.str_len(np.array([header_row1, header_row2], dtype=str))
+    lengths = lengths.max(axis=0)
+    if len(wide):
+        info_lengths = np.char.str_len(info_df.fillna("").to_numpy(dtype=str))
+        value_lengths = np.char.str_len(values.astype(str))
+        lengths = np.maximum(
+            lengths,
+            np.concatenate([info_lengths.max(axis=0), value_lengths.max(axis=0)]),
+        )
+    widths = np.clip(lengths + 2, 10, 50)  # Minimum 10, maximum 50
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Remaining Mandays")
+    for col_num, width in enumerate(widths.tolist(), start=1):
+        ws.column_dimensions[get_column_letter(col_num)].width = width
+
+    # Merge cells for employee codes in first row
+    for col_index in range(3, len(header_row1) + 1, 2):
+        ws.merged_cells.add(
+            f"{get_column_letter(col_index)}1:{get_column_letter(col_index + 1)}1"
+        )
+
+    # Style the headers
+    font = Font(bold=True)
+    alignment = Alignment(horizontal="center", vertical="center")
+    for header_row in (header_row1, header_row2):
+        cells = []
+        for value in header_row:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.font = font
+            cell.alignment = alignment
+            cells.append(cell)
+        ws.append(cells)
+
+    # Add data rows
+    for project, row_values in zip(info.tolist(), values.tolist()):
+        ws.append(project + row_values)
+
+    # Save to bytes buffer
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
@@ -0,0 +1,150 @@
+import threading
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+class SingleFlight:
+    """
+    Coalesce identical in-flight calls.
+
+    While a call for ``key`` is running, further calls with the same key wait
+    for it and receive the same result (or exception) instead of executing
+    again. Nothing is kept once the call has finished.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {"executed": 0, "coalesced": 0}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats["executed"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            if not call.done.is_set():
+                with _waiting():
+                    call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        return stats
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class QueryLimiter:
+    """
+    Cap the number of heavy queries running at once in this process.
+
+    Callers beyond ``slots`` queue on a semaphore instead of each taking a
+    pooled connection; a wait hook installed with ``on_wait`` is told while
+    the current thread is queued.
+    """
+
+    def __init__(self, slots):
+        self.slots = slots
+        self._semaphore = threading.BoundedSemaphore(slots)
+        self._lock = threading.Lock()
+        self._running = 0
+        self._queued = 0
+
+    @contextmanager
+    def slot(self):
+        if not self._semaphore.acquire(blocking=False):
+            with self._lock:
+                self._queued += 1
+            try:
+                with _waiting():
+                    self._semaphore.acquire()
+            finally:
+                with self._lock:
+                    self._queued -= 1
+        with self._lock:
+            self._running += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._running -= 1
+            self._semaphore.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "slots": self.slots,
+                "running": self._running,
+                "queued": self._queued,
+            }
+
+
+@contextmanager
+def on_wait(hook):
+    """
+    Call ``hook(True)`` whenever this thread starts waiting for data and
+    ``hook(False)`` when it may continue.
+    """
+    previous = getattr(_local, "hook", None)
+    _local.hook = hook
+    try:
+        yield
+    finally:
+        _local.hook = previous
+
+
+@contextmanager
+def _waiting():
+    hook = getattr(_local, "hook", None)
+    if hook is not None:
+        hook(True)
+    try:
+        yield
+    finally:
+        if hook is not None:
+            hook(False)
+
+
+def waiting_notice(message="Waiting for data…"):
+    """
+    on_wait hook for Streamlit pages: shows ``message`` in a placeholder at
+    the current position while the session is queued for data.
+    """
+    import streamlit as st
+
+    placeholder = st.empty()
+
+    def hook(waiting):
+        if waiting:
+            placeholder.info(message, icon="⏳")
+        else:
+            placeholder.empty()
+
+    return on_wait(hook)
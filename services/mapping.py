@@ -0,0 +1,155 @@
+"""
+Project mapping (project code to display name), stored in the
+``project_mapping`` table.
+
+The timesheet and remaining-mandays queries resolve display names by joining
+this table. Workbooks are only read or written through the explicit import
+and export helpers.
+
+The app never runs DDL itself, so it can connect with a read-only role; the
+table is created, and seeded from the workbook while empty, by:
+
+    python -m services.mapping init [WORKBOOK]
+"""
+
+import os
+from io import BytesIO
+
+import pandas as pd
+from sqlalchemy import text
+
+from services import db
+
+MAPPING_FILE = "master project mapping.xlsx"
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS project_mapping (
+        project_code text PRIMARY KEY,
+        project_name text NOT NULL,
+        updated_at timestamptz NOT NULL DEFAULT now()
+    )
+"""
+
+
+def read_mapping_excel(source):
+    """Parse a mapping workbook (path or file-like): names in B, codes in C."""
+    mapping_df = pd.read_excel(source, usecols="B:C")
+    mapping_df.columns = ["project_name", "project_code"]
+    mapping_df = mapping_df.dropna(subset=["project_name", "project_code"])
+    mapping_df = mapping_df.astype({"project_name": str, "project_code": str})
+    return mapping_df.reset_index(drop=True)
+
+
+def mapping_to_excel(mapping_df):
+    """Workbook bytes in the import layout: empty A, names in B, codes in C."""
+    excel_mapping = pd.DataFrame()
+    excel_mapping["A"] = [""] * len(mapping_df)  # Empty column A
+    excel_mapping["B"] = mapping_df["project_name"].tolist()
+    excel_mapping["C"] = mapping_df["project_code"].tolist()
+
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine="openpyxl") as writer:
+        excel_mapping.to_excel(writer, index=False, header=False)
+    return output.getvalue()
+
+
+def load_mapping():
+    """All mappings as a ``project_name``/``project_code`` frame."""
+    return pd.read_sql(
+        "SELECT project_name, project_code FROM project_mapping ORDER BY project_code",
+        db.get_engine(),
+    )
+
+
+def save_mapping(mapping_df):
+    """
+    Make the table match ``mapping_df`` in one transaction.
+
+    Rows are upserted on project_code and codes missing from ``mapping_df``
+    are deleted. Raises ValueError on duplicate project codes instead of
+    silently picking one.
+    """
+    mapping_df = mapping_df.dropna(subset=["project_name", "project_code"])
+    mapping_df = mapping_df.astype({"project_name": str, "project_code": str})
+    mapping_df = mapping_df.assign(
+        project_name=mapping_df["project_name"].str.strip(),
+        project_code=mapping_df["project_code"].str.strip(),
+    )
+    duplicated = mapping_df["project_code"].duplicated(keep=False)
+    if duplicated.any():
+        codes = sorted(mapping_df.loc[duplicated, "project_code"].unique())
+        raise ValueError(f"Duplicate project codes: {', '.join(codes)}")
+
+    rows = mapping_df[["project_code", "project_name"]].to_dict("records")
+    with db.get_engine().begin() as conn:
+        conn.execute(text("LOCK TABLE project_mapping IN SHARE ROW EXCLUSIVE MODE"))
+        if rows:
+            conn.execute(
+                text(
+                    """
+                    INSERT INTO project_mapping (project_code, project_name)
+                    VALUES (:project_code, :project_name)
+                    ON CONFLICT (project_code) DO UPDATE
+                    SET project_name = EXCLUDED.project_name,
+                        updated_at = now()
+                    WHERE project_mapping.project_name IS DISTINCT FROM EXCLUDED.project_name
+                    """
+                ),
+                rows,
+            )
+        conn.execute(
+            text(
+                "DELETE FROM project_mapping "
+                "WHERE NOT (project_code = ANY(:project_codes))"
+            ),
+            {"project_codes": [row["project_code"] for row in rows]},
+        )
+
+    # Results cached under the previous mapping version are never read again
+    # (here or in other processes, see db.mapping_version); free them here
+    db.clear_caches()
+    return len(rows)
+
+
+def import_mapping_excel(source):
+    """Replace the stored mapping with the contents of a workbook."""
+    return save_mapping(read_mapping_excel(source))
+
+
+def init(source=MAPPING_FILE):
+    """
+    Create the project_mapping table and, if it holds no rows yet, seed it
+    from the ``source`` workbook. Returns the number of mappings imported.
+    """
+    with db.get_engine().begin() as conn:
+        conn.execute(text(_SCHEMA))
+        empty = conn.execute(
+            text("SELECT NOT EXISTS (SELECT 1 FROM project_mapping)")
+        ).scalar()
+    if not empty or not os.path.exists(source):
+        return 0
+    return import_mapping_excel(source)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Create, import or export the mapping."
+    )
+    parser.add_argument("action", choices=["init", "import", "export"])
+    parser.add_argument("path", nargs="?", default=MAPPING_FILE)
+    args = parser.parse_args()
+
+    if args.action == "init":
+        print(f"Mapping table ready, seeded {init(args.path)} mappings")
+    elif args.action == "import":
+        print(f"Imported {import_mapping_excel(args.path)} mappings")
+    else:
+        with open(args.path, "wb") as f:
+            f.write(mapping_to_excel(load_mapping()))
+        print(f"Exported mapping to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
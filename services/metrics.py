@@ -0,0 +1,296 @@
+"""
+Lightweight per-stage timing for the report pages.
+
+A page creates a Render, wraps each stage in ``render.span(...)`` and calls
+``render.finish()`` at the end. Durations, row counts and bytes are
+aggregated per (page, stage) for the whole process and exported as
+Prometheus text, either over HTTP on METRICS_PORT or to METRICS_FILE.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+import pandas as pd
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+RECENT_SAMPLES = 200
+
+_lock = threading.Lock()
+_stages = {}
+_first_renders = {}
+_server = None
+
+
+def _process_started():
+    """Wall-clock start of this process, or of this module if unknown."""
+    try:
+        with open("/proc/self/stat") as f:
+            ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/stat") as f:
+            boot = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        return boot + ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration):
+        return time.time()
+
+
+PROCESS_STARTED = _process_started()
+
+
+class _Stage:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.buckets = [0] * len(BUCKETS)
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, seconds, rows, nbytes):
+        self.count += 1
+        self.seconds += seconds
+        self.rows += rows or 0
+        self.bytes += nbytes or 0
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+        self.recent.append(seconds)
+
+
+def _measure(value):
+    """Row count and (shallow) byte size of a stage result."""
+    if isinstance(value, pd.DataFrame):
+        return len(value), int(value.memory_usage(index=True).sum())
+    if isinstance(value, (bytes, str)):
+        return None, len(value)
+    return None, None
+
+
+class Span:
+    def __init__(self, stage):
+        self.stage = stage
+        self.seconds = 0.0
+        self.rows = None
+        self.bytes = None
+
+    def record(self, value=None, rows=None, nbytes=None):
+        """Attach the stage's result (or explicit rows/bytes) to the span."""
+        measured_rows, measured_bytes = _measure(value)
+        self.rows = rows if rows is not None else measured_rows
+        self.bytes = nbytes if nbytes is not None else measured_bytes
+        return value
+
+
+class Render:
+    """Timing spans for one run of a page script."""
+
+    def __init__(self, page):
+        self.page = page
+        self.started = time.perf_counter()
+        self.spans = []
+
+    @contextmanager
+    def span(self, stage):
+        span = Span(stage)
+        started = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.seconds = time.perf_counter() - started
+            self.spans.append(span)
+            observe(self.page, stage, span.seconds, span.rows, span.bytes)
+
+    def finish(self):
+        """Record the total render time and refresh the metrics file."""
+        seconds = time.perf_counter() - self.started
+        observe(self.page, "render", seconds, None, None)
+        with _lock:
+            # The first render of a page pays the imports and cold caches
+            _first_renders.setdefault(
+                self.page,
+                {
+                    "render": seconds,
+                    "process": time.time() - PROCESS_STARTED,
+                },
+            )
+        if config.METRICS_FILE:
+            write_file(config.METRICS_FILE)
+        return seconds
+
+    def to_frame(self):
+        return pd.DataFrame(
+            [
+                {
+                    "stage": span.stage,
+                    "seconds": round(span.seconds, 4),
+                    "rows": span.rows,
+                    "bytes": span.bytes,
+                }
+                for span in self.spans
+            ],
+            columns=["stage", "seconds", "rows", "bytes"],
+        )
+
+
+def observe(page, stage, seconds, rows=None, nbytes=None):
+    with _lock:
+        _stages.setdefault((page, stage), _Stage()).observe(seconds, rows, nbytes)
+
+
+def summary():
+    """Per (page, stage) counts with p50/p95 over the recent samples."""
+    with _lock:
+        items = [
+            (page, stage, data.count, list(data.recent))
+            for (page, stage), data in sorted(_stages.items())
+        ]
+    rows = []
+    for page, stage, count, recent in items:
+        series = pd.Series(recent, dtype=float)
+        rows.append(
+            {
+                "page": page,
+                "stage": stage,
+                "count": count,
+                "p50_seconds": round(series.quantile(0.5), 4),
+                "p95_seconds": round(series.quantile(0.95), 4),
+            }
+        )
+    return pd.DataFrame(
+        rows, columns=["page", "stage", "count", "p50_seconds", "p95_seconds"]
+    )
+
+
+def prometheus_text():
+    """
+    All stage metrics, plus database health, pool and cache gauges, in
+    Prometheus format.
+    """
+    from services import db, prewarm
+
+    lines = [
+        "# HELP report_stage_seconds Time spent per page stage.",
+        "# TYPE report_stage_seconds histogram",
+    ]
+    with _lock:
+        stages = sorted(
+            (key, (data.count, data.seconds, data.rows, data.bytes, list(data.buckets)))
+            for key, data in _stages.items()
+        )
+    for (page, stage), (count, seconds, _, _, buckets) in stages:
+        labels = f'page="{page}",stage="{stage}"'
+        for bound, value in zip(BUCKETS, buckets):
+            lines.append(
+                f'report_stage_seconds_bucket{{{labels},le="{bound}"}} {value}'
+            )
+        lines.append(f'report_stage_seconds_bucket{{{labels},le="+Inf"}} {count}')
+        lines.append(f"report_stage_seconds_sum{{{labels}}} {seconds}")
+        lines.append(f"report_stage_seconds_count{{{labels}}} {count}")
+    lines.append("# TYPE report_stage_rows_total counter")
+    for (page, stage), (_, _, rows, _, _) in stages:
+        lines.append(f'report_stage_rows_total{{page="{page}",stage="{stage}"}} {rows}')
+    lines.append("# TYPE report_stage_bytes_total counter")
+    for (page, stage), (_, _, _, nbytes, _) in stages:
+        lines.append(
+            f'report_stage_bytes_total{{page="{page}",stage="{stage}"}} {nbytes}'
+        )
+
+    lines.append("# TYPE report_first_render_seconds gauge")
+    with _lock:
+        first_renders = sorted(_first_renders.items())
+    for page, timings in first_renders:
+        for since, value in timings.items():
+            lines.append(
+                f'report_first_render_seconds{{page="{page}",since="{since}"}} {value}'
+            )
+    lines.append("# TYPE report_db_up gauge")
+    lines.append(f"report_db_up {int(db.check_health())}")
+    lines.append("# TYPE report_db_pool gauge")
+    for key, value in db.get_pool_stats().items():
+        lines.append(f'report_db_pool{{stat="{key}"}} {value}')
+    lines.append("# TYPE report_cache gauge")
+    for key, value in db.timesheet_cache.stats().items():
+        lines.append(f'report_cache{{stat="{key}"}} {value}')
+    runs, page_loads = prewarm.stats()
+    lines.append("# TYPE report_prewarm gauge")
+    for key, value in runs.items():
+        lines.append(f'report_prewarm{{stat="{key}"}} {value}')
+    lines.append("# TYPE report_page_loads_total counter")
+    for page, counts in sorted(page_loads.items()):
+        for cache, value in counts.items():
+            lines.append(
+                f'report_page_loads_total{{page="{page}",cache="{cache}"}} {value}'
+            )
+    if db.shared_cache is not None:
+        lines.append("# TYPE report_shared_cache gauge")
+        for key, value in db.shared_cache.stats().items():
+            lines.append(f'report_shared_cache{{stat="{key}"}} {value}')
+    lines.append("# TYPE report_query_limiter gauge")
+    for key, value in db.query_limiter.stats().items():
+        lines.append(f'report_query_limiter{{stat="{key}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def write_file(path):
+    """Write prometheus_text() atomically, for a textfile collector."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port=None):
+    """Serve /metrics on ``port`` (default METRICS_PORT) once per process."""
+    global _server
+    port = config.METRICS_PORT if port is None else port
+    if not port:
+        return None
+    with _lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            except OSError:
+                # Another process already serves this port
+                return None
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+
+def debug_expander(render):
+    """Opt-in sidebar expander with this run's spans and process p50/p95."""
+    import streamlit as st
+
+    if not st.sidebar.toggle("Show timings", key=f"debug_timings_{render.page}"):
+        return
+    with st.sidebar.expander("Timings", expanded=True):
+        st.write(f"Render so far: {time.perf_counter() - render.started:.3f}s")
+        st.dataframe(render.to_frame(), hide_index=True)
+        st.write("This process:")
+        st.dataframe(summary(), hide_index=True)
+        with _lock:
+            first = _first_renders.get(render.page)
+        if first is not None:
+            st.caption(
+                f"First render: {first['render']:.2f}s, "
+                f"{first['process']:.1f}s after process start"
+            )
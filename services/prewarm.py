@@ -0,0 +1,91 @@
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import config
+from services import db
+
+logger = logging.getLogger(__name__)
+
+# Sidebar defaults of the timesheet page, which is what most sessions load
+DEFAULT_STATUSES = ["Approved", "Modified"]
+
+_lock = threading.Lock()
+_thread = None
+_stats = {
+    "runs": 0,
+    "failures": 0,
+    "last_run_seconds": 0.0,
+    "last_run_at": 0.0,
+}
+_page_loads = {}
+
+
+def previous_week(today=None):
+    """Monday and Sunday of the week before ``today``."""
+    today = today or date.today()
+    start = today - timedelta(days=today.weekday(), weeks=1)
+    return start, start + timedelta(days=6)
+
+
+def warm(today=None):
+    """Load the default views into this process's caches."""
+    start_date, end_date = previous_week(today)
+    started = time.perf_counter()
+    try:
+        db.load_timesheet_projects(start_date, end_date)
+        db.load_timesheet_summary(start_date, end_date, statuses=DEFAULT_STATUSES)
+        db.load_planned_vs_realized_mandays()
+    except Exception:
+        logger.exception("Prewarming the default report views failed")
+        with _lock:
+            _stats["failures"] += 1
+        return False
+    with _lock:
+        _stats["runs"] += 1
+        _stats["last_run_seconds"] = time.perf_counter() - started
+        _stats["last_run_at"] = time.time()
+    return True
+
+
+def record_page_load(page, hot):
+    """Count a page load as served from a warm cache or not."""
+    with _lock:
+        counts = _page_loads.setdefault(page, {"hot": 0, "cold": 0})
+        counts["hot" if hot else "cold"] += 1
+
+
+def stats():
+    with _lock:
+        return dict(_stats), {page: dict(c) for page, c in _page_loads.items()}
+
+
+def _seconds_until_rollover(now):
+    """Seconds until next Monday 00:00, when the default week moves on."""
+    monday = (now - timedelta(days=now.weekday())).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    return (monday + timedelta(weeks=1) - now).total_seconds()
+
+
+def _run(interval):
+    while True:
+        warm()
+        # Wake up early for the weekly rollover so that Monday's first
+        # session already finds the new previous week cached
+        now = datetime.now()
+        time.sleep(max(min(interval, _seconds_until_rollover(now) + 1), 1))
+
+
+def start(interval=None):
+    """Prewarm now and every ``interval`` seconds, once per process."""
+    global _thread
+    interval = config.PREWARM_INTERVAL if interval is None else interval
+    if not interval:
+        return None
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, args=(interval,), daemon=True)
+            _thread.start()
+    return _thread
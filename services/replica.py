@@ -0,0 +1,327 @@
+"""
+Local Parquet replica of the denormalized timesheet rows.
+
+``sync()`` materializes the rows of db's timesheet query (every status, both
+billable kinds, plus the timesheet id) under REPLICA_DIR, one Parquet file
+per month:
+
+    REPLICA_DIR/timesheet/month=2026-09/part.parquet
+
+An incremental sync re-reads only the months holding timesheet entries
+updated since the stored watermark, which also drops rows deleted from those
+months; ``--full`` rebuilds every month (use it periodically for hard deletes
+elsewhere and renamed employees or modules, which leave no timesheet update
+behind). Project names are stored unmapped and resolved against
+project_mapping when read, so mapping edits apply immediately.
+
+When REPLICA_DIR is set and a sync has completed within REPLICA_MAX_LAG
+seconds, the cached timesheet, summary and project loaders of services.db
+read from the replica, pruned by month and filtered on date in the Parquet
+scan. A stopped or failing sync therefore falls back to Postgres instead of
+serving frozen data.
+
+Usage:
+    python -m services.replica [--full] [--interval SECONDS]
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timedelta, timezone
+
+import config
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import text
+
+from services import db
+
+SCHEMA = pa.schema(
+    [
+        ("entry_id", pa.int64()),
+        ("code", pa.string()),
+        ("date", pa.date32()),
+        ("project", pa.string()),
+        ("module", pa.string()),
+        ("status", pa.string()),
+        ("billable", pa.string()),
+        ("man_hours", pa.duration("us")),
+        ("name", pa.string()),
+        ("project_code", pa.string()),
+    ]
+)
+
+_PARTITIONING = ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive")
+
+# Same rows as the detail query, with the unmapped project name
+_REPLICA_QUERY = db._TIMESHEET_PAGE_SELECT.replace(
+    "COALESCE(project_mapping.project_name, ops_project.project_name) as project",
+    "ops_project.project_name as project",
+    1,
+).format(filters="")
+
+
+def _root():
+    return os.path.join(config.REPLICA_DIR, "timesheet")
+
+
+def _state_path():
+    return os.path.join(config.REPLICA_DIR, "state.json")
+
+
+def _month_path(month):
+    return os.path.join(_root(), f"month={month}", "part.parquet")
+
+
+def read_state():
+    """The last sync's watermark and time, or None if it never completed."""
+    if not config.REPLICA_DIR:
+        return None
+    try:
+        with open(_state_path()) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def synced_at():
+    """When the last completed sync finished, or None."""
+    state = read_state()
+    return None if state is None else datetime.fromisoformat(state["synced_at"])
+
+
+def available():
+    """Whether the last sync completed within REPLICA_MAX_LAG seconds."""
+    last = synced_at()
+    return last is not None and datetime.now(timezone.utc) - last <= timedelta(
+        seconds=config.REPLICA_MAX_LAG
+    )
+
+
+def _write_state(state):
+    tmp_path = f"{_state_path()}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, _state_path())
+
+
+def _months(start_date, end_date):
+    slices = db.date_slices(start_date, end_date)
+    return [start.strftime("%Y-%m") for start, _ in slices]
+
+
+def _stored_months():
+    if not os.path.isdir(_root()):
+        return set()
+    return {
+        entry.split("=", 1)[1]
+        for entry in os.listdir(_root())
+        if entry.startswith("month=")
+    }
+
+
+def _remove_partial_files():
+    """Drop temp files left in the month directories by an interrupted sync."""
+    for month in _stored_months():
+        directory = os.path.dirname(_month_path(month))
+        for name in os.listdir(directory):
+            if name.endswith(".tmp"):
+                os.remove(os.path.join(directory, name))
+
+
+def _sync_month(engine, month):
+    """Replace one month's file with the current rows from the database."""
+    start = pd.Timestamp(f"{month}-01")
+    end = start + pd.offsets.MonthEnd(0)
+    with engine.begin() as conn:
+        db.set_local_statement_timeout(conn, config.REFRESH_STATEMENT_TIMEOUT_MS)
+        df = pd.read_sql(
+            _REPLICA_QUERY,
+            conn,
+            params={"start_date": start.date(), "end_date": end.date()},
+        )
+    path = _month_path(month)
+    if df.empty:
+        shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+        return 0
+    table = pa.Table.from_pandas(
+        df[SCHEMA.names], schema=SCHEMA, preserve_index=False
+    ).sort_by([("date", "ascending"), ("code", "ascending")])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Dataset scans skip names starting with "." so readers never pick up a
+    # partly written file
+    tmp_path = os.path.join(os.path.dirname(path), f".part.{os.getpid()}.tmp")
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+    return len(df)
+
+
+def _changed_months(conn, watermark):
+    """Months of entries updated after ``watermark``, before and after."""
+    updated = config.ROLLUP_UPDATED_COLUMN
+    rows = conn.execute(
+        text(f'SELECT id, date FROM timesheet WHERE "{updated}" > :watermark'),
+        {"watermark": watermark},
+    ).all()
+    months = {day.strftime("%Y-%m") for _, day in rows}
+    if rows and os.path.isdir(_root()):
+        # Entries whose date moved still sit in their old month
+        stored = ds.dataset(_root(), format="parquet", partitioning=_PARTITIONING)
+        moved = stored.to_table(
+            columns=["month"],
+            filter=ds.field("entry_id").isin([entry_id for entry_id, _ in rows]),
+        )
+        months.update(moved["month"].to_pylist())
+    return months
+
+
+def sync(full=False):
+    """
+    Bring the replica up to date and return a summary of what was done.
+
+    Month files are replaced atomically one at a time, so readers see each
+    month either before or after the sync; a lock file keeps concurrent
+    syncs from interleaving. Queries run under REFRESH_STATEMENT_TIMEOUT_MS
+    rather than the app's statement timeout.
+    """
+    if not config.REPLICA_DIR:
+        raise RuntimeError("REPLICA_DIR is not set")
+    os.makedirs(config.REPLICA_DIR, exist_ok=True)
+    started = datetime.now(timezone.utc)
+    with open(os.path.join(config.REPLICA_DIR, ".lock"), "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return {"status": "skipped", "reason": "sync already running"}
+        _remove_partial_files()
+
+        engine = db.get_engine()
+        state = read_state()
+        with engine.begin() as conn:
+            db.set_local_statement_timeout(conn, config.REFRESH_STATEMENT_TIMEOUT_MS)
+            if full or state is None:
+                first, last = conn.execute(
+                    text("SELECT min(date), max(date) FROM timesheet")
+                ).one()
+                months = set(_months(first, last)) if first is not None else set()
+                for month in _stored_months() - months:
+                    shutil.rmtree(os.path.dirname(_month_path(month)))
+            else:
+                months = _changed_months(
+                    conn, datetime.fromisoformat(state["watermark"])
+                )
+
+        rows = sum(_sync_month(engine, month) for month in sorted(months))
+
+        # Overlap the next window like the rollup refresh does
+        watermark = started - timedelta(seconds=config.ROLLUP_WATERMARK_OVERLAP)
+        _write_state(
+            {
+                "watermark": watermark.isoformat(),
+                "synced_at": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+
+    return {
+        "status": "full" if full or state is None else "incremental",
+        "months": len(months),
+        "rows": rows,
+        "seconds": (datetime.now(timezone.utc) - started).total_seconds(),
+    }
+
+
+def _filter_expression(start_date, end_date, filters):
+    start_date = pd.Timestamp(start_date).date()
+    end_date = pd.Timestamp(end_date).date()
+    statuses, billable, project_codes, employee_code = filters
+    expression = (
+        (ds.field("month") >= start_date.strftime("%Y-%m"))
+        & (ds.field("month") <= end_date.strftime("%Y-%m"))
+        & (ds.field("date") >= start_date)
+        & (ds.field("date") <= end_date)
+    )
+    if statuses:
+        expression &= ds.field("status").isin(list(statuses))
+    if billable:
+        expression &= ds.field("billable").isin(list(billable))
+    if project_codes:
+        expression &= ds.field("project_code").isin(list(project_codes))
+    if employee_code:
+        expression &= pc.match_substring(
+            ds.field("code"), employee_code, ignore_case=True
+        )
+    return expression
+
+
+def query_timesheet_data(start_date, end_date, filters=db.timesheet_filters()):
+    """
+    Rows like db._query_timesheet_data, read from the replica.
+
+    Project names are mapped through project_mapping; rows come back
+    unsorted, as load_timesheet_data sorts them.
+    """
+    if not os.path.isdir(_root()):
+        return pd.DataFrame(columns=db.TIMESHEET_COLUMNS)
+    stored = ds.dataset(_root(), format="parquet", partitioning=_PARTITIONING)
+    table = stored.to_table(
+        columns=db.TIMESHEET_COLUMNS,
+        filter=_filter_expression(start_date, end_date, filters),
+    )
+    df = table.to_pandas()
+    df["man_hours"] = df["man_hours"].astype("timedelta64[ns]")
+
+    from services import mapping
+
+    names = mapping.load_mapping().set_index("project_code")["project_name"]
+    df["project"] = df["project_code"].map(names).fillna(df["project"])
+    return df
+
+
+def query_timesheet_summary(start_date, end_date, filters=db.timesheet_filters()):
+    """Hours per (name, date) like db._query_timesheet_summary."""
+    df = query_timesheet_data(start_date, end_date, filters)
+    hours = df["man_hours"].dt.total_seconds() / 3600
+    return (
+        hours.groupby([df["name"], df["date"]], sort=False)
+        .sum()
+        .rename("man_hours")
+        .reset_index()
+    )
+
+
+def query_timesheet_projects(start_date, end_date):
+    """Distinct (date, project_code, project) like db._query_timesheet_projects."""
+    df = query_timesheet_data(start_date, end_date)
+    return (
+        df.loc[df["project_code"].notna(), ["date", "project_code", "project"]]
+        .drop_duplicates()
+        .sort_values("project_code", kind="stable", ignore_index=True)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync the timesheet replica.")
+    parser.add_argument("--full", action="store_true", help="rebuild every month")
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=0,
+        help="keep running, syncing every INTERVAL seconds",
+    )
+    args = parser.parse_args()
+
+    while True:
+        print(f"{datetime.now().isoformat()} {sync(full=args.full)}", flush=True)
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Report transformations shared by the Streamlit pages, the benchmarks and
+batch jobs.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def timesheet_summary(rows):
+    """
+    Hours per (name, date) from timesheet rows with float ``man_hours``, the
+    same frame db.load_timesheet_summary returns.
+    """
+    return rows.groupby(["name", "date"], sort=True)["man_hours"].sum().reset_index()
+
+
+def person_date_pivot(summary_df):
+    """
+    Person x Date hours table with a Total row and column, built from the
+    (name, date, man_hours) frame returned by db.load_timesheet_summary.
+    """
+    pivot_table = summary_df.pivot(index="name", columns="date", values="man_hours")
+    pivot_table = pivot_table.fillna(0)
+    pivot_table.columns = [col.strftime("%Y-%m-%d") for col in pivot_table.columns]
+    pivot_table["Total"] = pivot_table.sum(axis=1)
+    pivot_table.loc["Total"] = pivot_table.sum(axis=0)
+    return pivot_table
+
+
+def zero_highlight_styles(pivot_table):
+    """
+    CSS for every cell of the pivot in one NumPy pass: red for empty
+    person-days, nothing for the Total row and column.
+    """
+    values = pivot_table.to_numpy()
+    mask = values == 0
+    mask[-1, :] = False
+    mask[:, -1] = False
+    return pd.DataFrame(
+        np.where(mask, "background-color: red", ""),
+        index=pivot_table.index,
+        columns=pivot_table.columns,
+    )
+
+
+def pivot_page(pivot_table, page, page_size):
+    """
+    Rows ``page`` (1-based) of the pivot, always followed by its Total row.
+    """
+    people = len(pivot_table) - 1
+    start = (page - 1) * page_size
+    stop = min(start + page_size, people)
+    return pd.concat([pivot_table.iloc[start:stop], pivot_table.iloc[[-1]]])
+
+
+def style_person_date_pivot(pivot_table):
+    """
+    Highlight empty person-days in red, leaving the totals unstyled.
+
+    Pass a pivot_page() slice so only the visible rows are styled and sent
+    to the browser.
+    """
+    return pivot_table.style.apply(zero_highlight_styles, axis=None).format("{:.2f}")
+
+
+REMAINING_MANDAYS_TYPES = {
+    "remaining_billable_mandays": "Bill",
+    "remaining_non_billable_mandays": "NonBill",
+}
+
+# Column suffixes of the flat table shown on screen and written to CSV
+_FLAT_SUFFIXES = {"Bill": "Billable", "NonBill": "NonBillable"}
+
+
+def remaining_mandays_wide(df):
+    """
+    Project x (employee, Bill/NonBill) table of remaining mandays from
+    db.load_planned_vs_realized_mandays.
+
+    Rows are indexed by (project_code, project_name), columns by
+    (employee_code, type) with both types present for every employee, in
+    employee code order. Build it once per render and derive the screen,
+    CSV and XLSX outputs from it.
+    """
+    wide = df.pivot_table(
+        index="project",
+        columns="employee_code",
+        values=list(REMAINING_MANDAYS_TYPES),
+        fill_value=0,
+    )
+    wide = wide.rename(columns=REMAINING_MANDAYS_TYPES, level=0).swaplevel(axis=1)
+    employees = wide.columns.get_level_values(0).unique().sort_values()
+    wide = wide.reindex(
+        columns=pd.MultiIndex.from_product(
+            [employees, list(REMAINING_MANDAYS_TYPES.values())],
+            names=["employee_code", "type"],
+        ),
+        fill_value=0,
+    )
+
+    # Display names come from the project_mapping join in the query
+    names = df.drop_duplicates(subset=["project"]).set_index("project")["project_name"]
+    wide.index = pd.MultiIndex.from_arrays(
+        [wide.index, names.reindex(wide.index).to_numpy()],
+        names=["project_code", "project_name"],
+    )
+    return wide
+
+
+def remaining_mandays_flat(wide):
+    """
+    remaining_mandays_wide() as one header row: project_code, project_name,
+    then ``<employee>_Billable`` / ``<employee>_NonBillable`` columns.
+    """
+    flat = wide.copy()
+    flat.columns = [
+        f"{employee}_{_FLAT_SUFFIXES[kind]}" for employee, kind in wide.columns
+    ]
+    return flat.reset_index()
@@ -0,0 +1,164 @@
+"""
+Refresh job for the planned-vs-realized mandays rollup.
+
+The rollup table holds the result of the planned/realized CTEs per
+(ops_project_id, employee). An incremental refresh recomputes only the
+projects whose timesheet or mandays rows were updated since the previous
+run; ``--full`` rebuilds everything (use it periodically to pick up hard
+deletes, which leave no update timestamp behind).
+
+Usage:
+    python -m services.rollup [--full] [--interval SECONDS]
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+import config
+from sqlalchemy import text
+
+from services import db
+
+_SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS {db.ROLLUP_TABLE} (
+        project text,
+        ops_project_id integer,
+        total_mandays numeric,
+        employee_code text,
+        realized_billable_mandays numeric,
+        remaining_billable_mandays numeric,
+        realized_non_billable_mandays numeric,
+        remaining_non_billable_mandays numeric,
+        total_realized_mandays numeric,
+        remaining_mandays numeric
+    );
+    CREATE INDEX IF NOT EXISTS {db.ROLLUP_TABLE}_ops_project_idx
+        ON {db.ROLLUP_TABLE} (ops_project_id, employee_code);
+    CREATE TABLE IF NOT EXISTS {db.ROLLUP_STATE_TABLE} (
+        name text PRIMARY KEY,
+        refreshed_at timestamptz NOT NULL,
+        watermark timestamptz NOT NULL
+    );
+"""
+
+_COLUMNS = """
+    project, ops_project_id, total_mandays, employee_code,
+    realized_billable_mandays, remaining_billable_mandays,
+    realized_non_billable_mandays, remaining_non_billable_mandays,
+    total_realized_mandays, remaining_mandays
+"""
+
+
+def _changed_projects(conn, watermark):
+    updated = config.ROLLUP_UPDATED_COLUMN
+    rows = conn.execute(
+        text(
+            f"""
+            SELECT ops_project_id FROM timesheet WHERE "{updated}" > :watermark
+            UNION
+            SELECT ops_project_id FROM mandays WHERE "{updated}" > :watermark
+            """
+        ),
+        {"watermark": watermark},
+    )
+    return tuple(row[0] for row in rows if row[0] is not None)
+
+
+def refresh(full=False):
+    """
+    Bring the rollup up to date and return a summary of what was done.
+
+    Runs in one transaction under an advisory lock so that concurrent
+    refreshers never interleave; readers keep seeing the previous rollup
+    until commit. The app's statement timeout is replaced by
+    REFRESH_STATEMENT_TIMEOUT_MS.
+    """
+    engine = db.get_engine()
+    started = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        db.set_local_statement_timeout(conn, config.REFRESH_STATEMENT_TIMEOUT_MS)
+        for statement in _SCHEMA.split(";"):
+            if statement.strip():
+                conn.execute(text(statement))
+        locked = conn.execute(
+            text("SELECT pg_try_advisory_xact_lock(hashtext(:name))"),
+            {"name": db.ROLLUP_TABLE},
+        ).scalar()
+        if not locked:
+            return {"status": "skipped", "reason": "refresh already running"}
+
+        watermark = conn.execute(
+            text(f"SELECT watermark FROM {db.ROLLUP_STATE_TABLE} WHERE name = :name"),
+            {"name": db.ROLLUP_NAME},
+        ).scalar()
+
+        if full or watermark is None:
+            conn.execute(text(f"DELETE FROM {db.ROLLUP_TABLE}"))
+            query = db._PLANNED_VS_REALIZED_QUERY.format(
+                planned_filter="", realized_filter=""
+            )
+            params = {}
+            projects = None
+        else:
+            projects = _changed_projects(conn, watermark)
+            if projects:
+                conn.exec_driver_sql(
+                    f"DELETE FROM {db.ROLLUP_TABLE} "
+                    "WHERE ops_project_id IN %(ops_project_ids)s",
+                    {"ops_project_ids": projects},
+                )
+            query = db._PLANNED_VS_REALIZED_QUERY.format(
+                planned_filter="WHERE m.ops_project_id IN %(ops_project_ids)s",
+                realized_filter="AND op.id IN %(ops_project_ids)s",
+            )
+            params = {"ops_project_ids": projects}
+
+        if projects is None or projects:
+            conn.exec_driver_sql(
+                f"INSERT INTO {db.ROLLUP_TABLE} ({_COLUMNS}) {query}", params
+            )
+
+        # Overlap the next window a little so rows committed by transactions
+        # that were still open when this one started are not missed
+        new_watermark = started - timedelta(seconds=config.ROLLUP_WATERMARK_OVERLAP)
+        conn.execute(
+            text(
+                f"""
+                INSERT INTO {db.ROLLUP_STATE_TABLE} (name, refreshed_at, watermark)
+                VALUES (:name, now(), :watermark)
+                ON CONFLICT (name) DO UPDATE
+                SET refreshed_at = EXCLUDED.refreshed_at,
+                    watermark = EXCLUDED.watermark
+                """
+            ),
+            {"name": db.ROLLUP_NAME, "watermark": new_watermark},
+        )
+
+    return {
+        "status": "full" if projects is None else "incremental",
+        "projects": None if projects is None else len(projects),
+        "seconds": (datetime.now(timezone.utc) - started).total_seconds(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the mandays rollup.")
+    parser.add_argument("--full", action="store_true", help="rebuild everything")
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=0,
+        help="keep running, refreshing every INTERVAL seconds",
+    )
+    args = parser.parse_args()
+
+    while True:
+        print(f"{datetime.now().isoformat()} {refresh(full=args.full)}", flush=True)
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
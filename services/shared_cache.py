@@ -0,0 +1,168 @@
+"""
+Query results shared between app replicas through a common directory.
+
+Each result is one Arrow IPC file named after a hash of its key and the
+cache's ``version``, which the owner changes whenever the stored frames
+would change, so files written by an older release are never read. Files
+are written to a temporary name and renamed into place, so readers never
+see a partial result. A striped ``flock`` makes concurrent misses for the
+same key, from any process, wait for a single fetch. Entries carry an
+optional expiry time, and once the directory exceeds ``max_bytes`` the
+least recently used files are removed.
+
+Any object with ``get_or_fetch(key, fetch, ttl)`` and ``clear()`` can be
+used in its place by PartitionCache.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+
+import pyarrow as pa
+
+_LOCK_STRIPES = 256
+
+
+class FileResultCache:
+    def __init__(self, directory, max_bytes, version=""):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.version = version
+        os.makedirs(os.path.join(directory, "locks"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "publishes": 0, "evictions": 0}
+
+    def get_or_fetch(self, key, fetch, ttl=None):
+        """
+        Return the stored frame for ``key``, or ``fetch()`` it and publish
+        it for ``ttl`` seconds (forever when None).
+        """
+        digest = _digest((self.version, key))
+        df = self._read(digest)
+        if df is None:
+            with self._key_lock(digest):
+                # Another process may have published while we waited
+                df = self._read(digest)
+                if df is None:
+                    self._count("misses")
+                    df = fetch()
+                    self._write(digest, df, ttl)
+                    self._evict()
+                    return df
+        self._count("hits")
+        return df
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".arrow"):
+                _remove(os.path.join(self.directory, name))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["bytes"] = sum(size for _, size, _ in self._files())
+        return stats
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _path(self, digest):
+        return os.path.join(self.directory, f"{digest}.arrow")
+
+    def _key_lock(self, digest):
+        stripe = int(digest[:8], 16) % _LOCK_STRIPES
+        return _FileLock(os.path.join(self.directory, "locks", f"{stripe}.lock"))
+
+    def _read(self, digest):
+        path = self._path(digest)
+        try:
+            with pa.memory_map(path) as source:
+                table = pa.ipc.open_file(source).read_all()
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+        metadata = table.schema.metadata or {}
+        expires_at = float(metadata.get(b"expires_at", b"0"))
+        if expires_at and expires_at < time.time():
+            _remove(path)
+            return None
+        # Mark as recently used for eviction
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        df = table.to_pandas()
+        df.columns = json.loads(metadata[b"columns"])
+        return df
+
+    def _write(self, digest, df, ttl):
+        # Columns are stored by position; result frames may repeat names
+        table = pa.Table.from_pandas(
+            df.set_axis([str(i) for i in range(df.shape[1])], axis=1),
+            preserve_index=False,
+        )
+        table = table.replace_schema_metadata(
+            {
+                **(table.schema.metadata or {}),
+                b"columns": json.dumps([str(c) for c in df.columns]).encode(),
+                b"expires_at": str(time.time() + ttl if ttl else 0).encode(),
+            }
+        )
+        path = self._path(digest)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        self._count("publishes")
+
+    def _files(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".arrow"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, name))
+        return files
+
+    def _evict(self):
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        # Keep at least the newest file, like PartitionCache
+        for _, size, name in files[:-1]:
+            if total <= self.max_bytes:
+                break
+            _remove(os.path.join(self.directory, name))
+            total -= size
+            self._count("evictions")
+
+
+class _FileLock:
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        self._file = open(self.path, "a")
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+
+def _digest(key):
+    return hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,192 @@
+"""
+Cold-start profiling and container warm-up.
+
+``profile`` imports the page dependencies in a fresh interpreter with
+``-X importtime`` and reports the slowest modules, plus the first render
+times recorded by services.metrics when the app's metrics endpoint is given.
+``warm-up`` runs at container start, next to the app server. Once the
+database answers and the server passes its health check, it opens a session over the server's
+websocket, as a browser does, and waits for the main page to finish
+rendering. That render runs inside the server process, so the imports, the
+connection pool, the in-process caches (plus the shared cache when
+SHARED_CACHE_DIR is set) and the services.prewarm thread are all warm
+before the first user arrives.
+
+Usage:
+    python -m services.startup profile [--top 20] [--metrics-url URL]
+    python -m services.startup warm-up [--url http://localhost:8501]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What app.py and the pages import, in import order
+PAGE_MODULES = [
+    "streamlit",
+    "pandas",
+    "config",
+    "services.db",
+    "services.export",
+    "services.reports",
+    "services.metrics",
+    "services.prewarm",
+    "services.mapping",
+]
+
+
+def import_profile(modules=PAGE_MODULES, top=20):
+    """
+    Import times of ``modules`` in a fresh interpreter: the total, modules
+    that failed to import and the ``top`` slowest modules by cumulative time.
+    """
+    # Modules that fail to import are reported instead of aborting the run
+    code = (
+        "import sys\n"
+        f"for module in {list(modules)!r}:\n"
+        "    try:\n"
+        "        __import__(module)\n"
+        "    except Exception as exc:\n"
+        "        print(module, repr(exc), file=sys.stdout)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header line
+        timings.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip())) // 2,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            }
+        )
+    total_ms = sum(t["cumulative_ms"] for t in timings if t["depth"] == 0)
+    timings.sort(key=lambda t: t["cumulative_ms"], reverse=True)
+    return {
+        "total_ms": total_ms,
+        "failed": result.stdout.splitlines(),
+        "modules": timings[:top],
+    }
+
+
+def first_renders(metrics_url):
+    """report_first_render_seconds samples from a running app's /metrics."""
+    with urllib.request.urlopen(metrics_url, timeout=5) as response:
+        text = response.read().decode("utf-8")
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith("report_first_render_seconds{"):
+            labels, value = line.rsplit(" ", 1)
+            samples[labels[len("report_first_render_seconds") :]] = float(value)
+    return samples
+
+
+def wait_until_healthy(url, timeout=300):
+    """Poll the server's health endpoint until it answers; False on timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/_stcore/health", timeout=5):
+                return True
+        except OSError:
+            time.sleep(1)
+    return False
+
+
+def render_once(url, timeout=600):
+    """
+    Run the main page once in the server at ``url`` through a websocket
+    session; returns how the script finished (e.g. FINISHED_SUCCESSFULLY).
+    """
+    import asyncio
+
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+    from tornado.httpclient import HTTPRequest
+    from tornado.websocket import websocket_connect
+
+    async def session():
+        request = HTTPRequest(
+            url.replace("http", "ws", 1) + "/_stcore/stream",
+            headers={"Sec-WebSocket-Protocol": "streamlit"},
+        )
+        connection = await websocket_connect(request)
+        try:
+            rerun = BackMsg()
+            rerun.rerun_script.query_string = ""
+            await connection.write_message(rerun.SerializeToString(), binary=True)
+            while True:
+                payload = await connection.read_message()
+                if payload is None:
+                    raise ConnectionError("server closed the session")
+                message = ForwardMsg()
+                message.ParseFromString(payload)
+                if message.WhichOneof("type") == "script_finished":
+                    return ForwardMsg.ScriptFinishedStatus.Name(message.script_finished)
+        finally:
+            connection.close()
+
+    return asyncio.run(asyncio.wait_for(session(), timeout))
+
+
+def warm_up(url="http://localhost:8501"):
+    """
+    Check the database, wait for the server and render the main page in it;
+    returns step timings. Nothing is rendered while the database is down.
+    """
+    from services import db
+
+    url = url.rstrip("/")
+    steps = {}
+    started = time.perf_counter()
+    steps["database_ok"] = db.check_health()
+    steps["database_check"] = time.perf_counter() - started
+    started = time.perf_counter()
+    steps["server_ready"] = wait_until_healthy(url)
+    steps["server_wait"] = time.perf_counter() - started
+    if steps["database_ok"] and steps["server_ready"]:
+        started = time.perf_counter()
+        steps["render_status"] = render_once(url)
+        steps["render"] = time.perf_counter() - started
+    return steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile or warm up app startup.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    profile = commands.add_parser("profile", help="import-time breakdown")
+    profile.add_argument("--top", type=int, default=20)
+    profile.add_argument(
+        "--metrics-url", help="e.g. http://localhost:9464/metrics, for first renders"
+    )
+    warm = commands.add_parser("warm-up", help="render once in a running server")
+    warm.add_argument("--url", default="http://localhost:8501")
+    args = parser.parse_args()
+
+    if args.command == "profile":
+        report = import_profile(top=args.top)
+        if args.metrics_url:
+            report["first_render_seconds"] = first_renders(args.metrics_url)
+    else:
+        report = warm_up(args.url)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
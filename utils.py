@@ -1,11 +1,22 @@
 import pandas as pd
 
 
-def convert_timedelta_to_hours(duration):
-    if isinstance(duration, str):
-        duration = pd.to_timedelta(duration)
-    elif isinstance(duration, pd.Timedelta):
-        pass
-    else:
-        return 0
-    return duration.total_seconds() / 3600
+def convert_timedeltas_to_hours(durations):
+    """
+    Convert a Series of durations to float hours.
+
+    Timedeltas and timedelta strings become float hours; anything else,
+    including NaN/NaT and unparseable strings, becomes 0.
+    """
+    durations = pd.Series(durations)
+    if durations.dtype == object:
+        kind = pd.api.types.infer_dtype(durations, skipna=True)
+        if kind not in ("timedelta", "string", "empty"):
+            # Numbers (and bools) would be read as nanoseconds or rejected;
+            # they count as 0 like every other non-duration
+            numeric = pd.to_numeric(durations, errors="coerce").notna()
+            durations = durations.mask(numeric)
+        durations = pd.to_timedelta(durations, errors="coerce")
+    elif not pd.api.types.is_timedelta64_dtype(durations.dtype):
+        return pd.Series(0.0, index=durations.index)
+    return (durations.dt.total_seconds() / 3600).fillna(0)